@@ -16,4 +16,35 @@ RANDOM_SEARCH_PARAMS = {
     "verbose" : 2,
     "random_state" : 42,
     "scoring" : "accuracy"
-}
\ No newline at end of file
+}
+
+# "random" runs RandomizedSearchCV with RANDOM_SEARCH_PARAMS above,
+# "halving" / "hyperband" run HalvingSearch with HALVING_SEARCH_PARAMS
+SEARCH_MODE = "random"
+
+HALVING_SEARCH_PARAMS = {
+    "n_trials" : 27,                # configs in the widest bracket
+    "min_resource" : 20,            # boosting rounds in the first rung
+    "max_resource" : 500,           # boosting rounds cap, replaces n_estimators
+    "eta" : 3,
+    "validation_size" : 0.2,
+    "early_stopping_rounds" : 20,
+    "n_jobs" : -1,
+    "threads_per_trial" : 1,
+    "time_budget_seconds" : None,
+    "random_state" : 42,
+    "scoring" : "accuracy"
+}
+
+# incremental mode continues boosting the current model on a newly
+# ingested partition only, and promotes the result only if no metric in
+# promotion_metrics drops by more than max_regression on either holdout
+# (the previous test set and a held-out share of the new partition)
+INCREMENTAL_PARAMS = {
+    "n_estimators" : 100,           # extra boosting rounds
+    "learning_rate" : None,         # None keeps the current model's rate
+    "holdout_size" : 0.2,
+    "promotion_metrics" : ["accuracy", "f1"],
+    "max_regression" : 0.0,
+    "random_state" : 42,
+}
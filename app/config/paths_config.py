@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+from app.config.secrets import SecretManager
+
 def get_project_root() -> Path:
     """Find the project root by looking for pyproject.toml or .git"""
     current = Path(__file__).resolve()
@@ -12,14 +14,17 @@ def get_project_root() -> Path:
 
 APP_BASE_DIR = get_project_root()
 
+ARTIFACT_EXTENSION = SecretManager.ARTIFACT_FORMAT
+
 
 ##################### DATA INGESTION ###################
 
 
 RAW_DIR =  APP_BASE_DIR / "artifacts/raw"
 RAW_FILE_PATH = os.path.join(RAW_DIR, "raw.csv")
-TRAIN_FILE_PATH = os.path.join(RAW_DIR, "train.csv")
-TEST_FILE_PATH = os.path.join(RAW_DIR, "test.csv")
+TRAIN_FILE_PATH = os.path.join(RAW_DIR, f"train.{ARTIFACT_EXTENSION}")
+TEST_FILE_PATH = os.path.join(RAW_DIR, f"test.{ARTIFACT_EXTENSION}")
+NEW_PARTITION_PATH = os.path.join(RAW_DIR, f"new_partition.{ARTIFACT_EXTENSION}")
 
 CONFIG_PATH = APP_BASE_DIR / "app/config/config.yaml"
 
@@ -30,12 +35,22 @@ CONFIG_PATH = APP_BASE_DIR / "app/config/config.yaml"
 
 
 PROCESSED_DIR = APP_BASE_DIR / "artifacts/processed"
-PROCESSED_TRAIN_DATA_PATH = os.path.join(PROCESSED_DIR, "processed_train.csv")
-PROCESSED_TEST_DATA_PATH = os.path.join(PROCESSED_DIR, "processed_test.csv")
+PROCESSED_TRAIN_DATA_PATH = os.path.join(PROCESSED_DIR, f"processed_train.{ARTIFACT_EXTENSION}")
+PROCESSED_TEST_DATA_PATH = os.path.join(PROCESSED_DIR, f"processed_test.{ARTIFACT_EXTENSION}")
+PROCESSED_TRANSFORMER_PATH = os.path.join(PROCESSED_DIR, "preprocessor.json")
 
 
 
 
 ############# MODEL TRAINING ###########################
 MODEL_OUTPUT_PATH = APP_BASE_DIR / "artifacts/models/lgbm_model.pkl"
-MODEL_DIR = APP_BASE_DIR / "artifacts/models/"
\ No newline at end of file
+COMPILED_MODEL_OUTPUT_PATH = APP_BASE_DIR / "artifacts/models/lgbm_model.npz"
+TRANSFORMER_OUTPUT_PATH = APP_BASE_DIR / "artifacts/models/preprocessor.json"
+MODEL_DIR = APP_BASE_DIR / "artifacts/models/"
+MODEL_VERSIONS_DIR = APP_BASE_DIR / "artifacts/models/versions"
+FEATURES_PATH = APP_BASE_DIR / "features.json"
+SHADOW_REPORT_OUTPUT_PATH = APP_BASE_DIR / "artifacts/shadow/shadow_report.jsonl"
+
+
+############# PIPELINE ###########################
+STAGE_CACHE_DIR = APP_BASE_DIR / "artifacts/.stage_cache"
\ No newline at end of file
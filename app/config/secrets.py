@@ -28,4 +28,78 @@ class Environment(Enum):
 class SecretManager:
 
     PORT : int = int(os.environ.get("PORT", "8080"))
-    ENV : Environment = Environment.from_string(os.environ.get("ENV", "local"))
\ No newline at end of file
+    ENV : Environment = Environment.from_string(os.environ.get("ENV", "local"))
+    MAX_BATCH_SIZE : int = int(os.environ.get("MAX_BATCH_SIZE", "10000"))
+
+    # forked workers outside local environments, 0 sizes the pool from the
+    # CPUs and cgroup quota available to the container
+    WORKERS : int = int(os.environ.get("WEB_CONCURRENCY", "0"))
+    GRACEFUL_TIMEOUT_SECONDS : float = float(os.environ.get("GRACEFUL_TIMEOUT_SECONDS", "30"))
+
+    MICRO_BATCHING_ENABLED : bool = os.environ.get("MICRO_BATCHING_ENABLED", "false").lower() == "true"
+    MICRO_BATCH_MAX_SIZE : int = int(os.environ.get("MICRO_BATCH_MAX_SIZE", "64"))
+    MICRO_BATCH_WINDOW_MS : float = float(os.environ.get("MICRO_BATCH_WINDOW_MS", "2"))
+
+    # "compiled" serves the NumPy forest, "lightgbm" the pickled classifier,
+    # "auto" prefers the compiled artifact when it exists
+    MODEL_BACKEND : str = os.environ.get("MODEL_BACKEND", "auto").lower()
+
+    PREDICTION_CACHE_SIZE : int = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+    PREDICTION_CACHE_TTL_SECONDS : float = float(os.environ.get("PREDICTION_CACHE_TTL_SECONDS", "300"))
+    # batch routes skip the cache unless enabled here: its per-row key
+    # hashing only pays off when batches repeat rows already seen
+    PREDICTION_CACHE_BATCH_ROUTES : bool = os.environ.get("PREDICTION_CACHE_BATCH_ROUTES", "false").lower() == "true"
+
+    # pin a version from MODEL_DIR/versions, empty serves the newest one
+    MODEL_VERSION : str = os.environ.get("MODEL_VERSION", "")
+    MODEL_WARMUP_ROWS : int = int(os.environ.get("MODEL_WARMUP_ROWS", "256"))
+    MODEL_WATCH_INTERVAL_SECONDS : float = float(os.environ.get("MODEL_WATCH_INTERVAL_SECONDS", "0"))
+
+    # OpenMP/BLAS threads per serving process; requests already run in
+    # parallel across workers, so more than one oversubscribes the CPUs
+    SERVE_THREADS : int = int(os.environ.get("SERVE_THREADS", os.environ.get("OMP_NUM_THREADS", "1")))
+    # dedicated threads for model calls per process, and how many calls may
+    # wait for one; beyond that, or after waiting longer than the timeout
+    # (0 waits forever), requests are shed with INFERENCE_SHED_STATUS (429 or 503)
+    INFERENCE_WORKERS : int = int(os.environ.get("INFERENCE_WORKERS", "2"))
+    INFERENCE_QUEUE_SIZE : int = int(os.environ.get("INFERENCE_QUEUE_SIZE", "64"))
+    INFERENCE_QUEUE_TIMEOUT_SECONDS : float = float(os.environ.get("INFERENCE_QUEUE_TIMEOUT_SECONDS", "1"))
+    INFERENCE_SHED_STATUS : int = int(os.environ.get("INFERENCE_SHED_STATUS", "503"))
+    # startup warm-up: synthetic requests of each batch size, repeated in
+    # rounds until every size's latency moves less than the tolerance
+    WARMUP_BATCH_SIZES : list = [int(size) for size in os.environ.get("WARMUP_BATCH_SIZES", "1,32,512").split(",") if size.strip()]
+    WARMUP_MAX_ROUNDS : int = int(os.environ.get("WARMUP_MAX_ROUNDS", "20"))
+    WARMUP_SETTLE_TOLERANCE : float = float(os.environ.get("WARMUP_SETTLE_TOLERANCE", "0.2"))
+    # warm-ups rerun in the background when the first did not settle; the
+    # worker turns ready unsettled, with a warning, once they are used up
+    WARMUP_SETTLE_RETRIES : int = int(os.environ.get("WARMUP_SETTLE_RETRIES", "3"))
+    ADMIN_TOKEN : str = os.environ.get("ADMIN_TOKEN", "")
+
+    # shadow scoring: a candidate from MODEL_DIR/versions ("latest" for the
+    # newest, empty disables) scores SHADOW_SAMPLE_RATE of the scored rows in
+    # the background; pin MODEL_VERSION so the newest version is not served too
+    SHADOW_MODEL_VERSION : str = os.environ.get("SHADOW_MODEL_VERSION", "")
+    SHADOW_SAMPLE_RATE : float = float(os.environ.get("SHADOW_SAMPLE_RATE", "0.1"))
+    SHADOW_MAX_PENDING_ROWS : int = int(os.environ.get("SHADOW_MAX_PENDING_ROWS", "10000"))
+    SHADOW_FLUSH_INTERVAL_SECONDS : float = float(os.environ.get("SHADOW_FLUSH_INTERVAL_SECONDS", "60"))
+    # "file" appends a JSON line per flush to SHADOW_REPORT_PATH (default
+    # artifacts/shadow/shadow_report.jsonl), "mlflow" logs to one run per process
+    SHADOW_REPORT_SINK : str = os.environ.get("SHADOW_REPORT_SINK", "file").lower()
+    SHADOW_REPORT_PATH : str = os.environ.get("SHADOW_REPORT_PATH", "")
+
+    # directory the workers of one server merge their /metrics through;
+    # empty uses a per-server temp directory when running as a uvicorn
+    # worker process and plain in-process metrics otherwise
+    METRICS_MULTIPROC_DIR : str = os.environ.get("METRICS_MULTIPROC_DIR", "")
+    METRICS_FLUSH_INTERVAL_SECONDS : float = float(os.environ.get("METRICS_FLUSH_INTERVAL_SECONDS", "1"))
+
+    # "console" writes colored lines synchronously, "json" queues records
+    # for a background writer thread; "auto" uses console in local environments
+    LOG_FORMAT : str = os.environ.get("LOG_FORMAT", "auto").lower()
+    LOG_QUEUE_SIZE : int = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+    # JSON mode only: records per second from one call site below WARNING, 0 for no limit
+    LOG_RATE_LIMIT_PER_SECOND : int = int(os.environ.get("LOG_RATE_LIMIT_PER_SECOND", "20"))
+
+    # on-disk format of the raw splits and processed datasets: "parquet",
+    # "feather" (uncompressed, memory-mappable) or "csv"
+    ARTIFACT_FORMAT : str = os.environ.get("ARTIFACT_FORMAT", "parquet").lower()
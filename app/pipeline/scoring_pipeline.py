@@ -0,0 +1,149 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.config.paths_config import *
+from app.srv.feature_transformer import FeatureTransformer
+from app.utils.file_handler import read_yaml, load_data, ChunkWriter
+from app.utils.logger import AppLogger
+from app.utils.error import CustomException
+
+
+logger = AppLogger(__name__)()
+
+# populated once per worker process by _init_worker
+_worker_state = {}
+
+
+def _init_worker(model_version: Optional[str], fallback: Optional[dict], features: list):
+    from app.srv.api.registry import ModelRegistry
+
+    loaded = ModelRegistry().load(model_version)
+    _worker_state["model"] = loaded
+    _worker_state["transformer"] = loaded.transformer or FeatureTransformer.from_dict(fallback)
+    _worker_state["features"] = features
+
+
+def _score_chunk(chunk: pd.DataFrame, id_column: Optional[str]) -> pd.DataFrame:
+    loaded = _worker_state["model"]
+    chunk = _worker_state["transformer"].transform(chunk)
+
+    X = chunk[_worker_state["features"]].to_numpy(dtype=np.float32)
+    probabilities = loaded.model.predict_proba(X)
+    labels = loaded.model.classes_[probabilities.argmax(axis=1)]
+
+    scored = pd.DataFrame({
+        "prediction": np.where(labels == 1, "Valid", "Invalid"),
+        "probability": probabilities[:, 1],
+    }, index=chunk.index)
+    scored["model_version"] = loaded.version
+
+    if id_column and id_column in chunk.columns:
+        scored.insert(0, id_column, chunk[id_column].to_numpy())
+    return scored
+
+
+def read_chunks(path: str, chunksize: int, columns: list) -> Iterator[pd.DataFrame]:
+    if str(path).endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        available = [col for col in columns if col in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=available):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=lambda col: col in columns)
+
+
+class BulkScorer:
+
+    def __init__(self, input_path: str, output_path: str, config_path: str = CONFIG_PATH,
+                 chunksize: int = 50_000, workers: Optional[int] = None,
+                 model_version: Optional[str] = None, id_column: Optional[str] = "Booking_ID"):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.config = read_yaml(config_path)
+        self.chunksize = chunksize
+        self.workers = workers or os.cpu_count() or 1
+        self.model_version = model_version
+        self.id_column = id_column
+
+    def run(self):
+        try:
+            from app.srv.api.dto import FEATURE_COLUMNS
+
+            start = time.perf_counter()
+            features = list(FEATURE_COLUMNS)
+            columns = features + ([self.id_column] if self.id_column else [])
+
+            logger.info(f"Scoring {self.input_path} in chunks of {self.chunksize} rows on {self.workers} workers")
+            fallback = self._fallback_transformer()
+
+            writer = ChunkWriter(self.output_path)
+            n_rows = 0
+
+            # at most two chunks per worker are in flight, which bounds memory
+            # regardless of input size while keeping every core busy
+            max_pending = self.workers * 2
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(self.model_version, fallback, features)) as pool:
+                pending = deque()
+                for chunk in read_chunks(self.input_path, self.chunksize, columns):
+                    pending.append(pool.submit(_score_chunk, chunk, self.id_column))
+                    if len(pending) >= max_pending:
+                        n_rows += self._drain_one(pending, writer)
+
+                while pending:
+                    n_rows += self._drain_one(pending, writer)
+
+            writer.close()
+
+            elapsed = time.perf_counter() - start
+            logger.info(f"Scored {n_rows} rows in {elapsed:.1f}s ({n_rows / max(elapsed, 1e-9):,.0f} rows/s) into {self.output_path}")
+
+        except Exception as e:
+            logger.error(f"Error while bulk scoring : {e}")
+            raise CustomException("Failed to score file", e)
+
+    def _fallback_transformer(self) -> Optional[dict]:
+        """
+        Models published before the transform was persisted have no
+        preprocessor.json; refit one on the training split for those.
+        """
+        from app.srv.api.registry import ModelRegistry
+
+        _, path = ModelRegistry().resolve(self.model_version)
+        if (path.parent / TRANSFORMER_OUTPUT_PATH.name).exists():
+            return None
+
+        logger.warning(f"No persisted preprocessing transform for {path}, refitting on {TRAIN_FILE_PATH}")
+        df = load_data(TRAIN_FILE_PATH).drop(columns=['Unnamed: 0', 'Booking_ID'], errors="ignore").drop_duplicates()
+        return FeatureTransformer.from_config(self.config).fit(df).to_dict()
+
+    @staticmethod
+    def _drain_one(pending: deque, writer: ChunkWriter) -> int:
+        scored = pending.popleft().result()
+        writer.write(scored)
+        return len(scored)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file of reservations with the saved model")
+    parser.add_argument("input", help="CSV or .parquet file of raw reservations")
+    parser.add_argument("output", help="CSV or .parquet file to write predictions to")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=None, help="defaults to the number of CPUs")
+    parser.add_argument("--model-version", default=None, help="version under MODEL_DIR/versions, defaults to the newest")
+    parser.add_argument("--id-column", default="Booking_ID", help="input column copied to the output, '' to skip")
+    args = parser.parse_args()
+
+    scorer = BulkScorer(args.input, args.output, chunksize=args.chunksize, workers=args.workers,
+                        model_version=args.model_version, id_column=args.id_column or None)
+
+    scorer.run()
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from app.config.paths_config import APP_BASE_DIR, STAGE_CACHE_DIR
+from app.utils.logger import AppLogger
+from app.utils.error import CustomException
+from app.utils.memory import peak_rss_mb, reset_peak_rss
+
+logger = AppLogger(__name__)()
+
+
+def file_digest(path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Stage:
+    """
+    One cacheable pipeline step. Its key hashes the contents of `inputs`,
+    the `config` section it reads and the source of the `code` files that
+    implement it; `outputs` are the files it produces. `on_hit` runs after
+    a cache hit restored the outputs, for side effects beyond those files.
+    """
+
+    def __init__(self, name: str, run: Callable[[], None], inputs: Sequence = (), outputs: Sequence = (),
+                 config: Optional[dict] = None, code: Sequence = (), extra: Optional[str] = None,
+                 on_hit: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.run = run
+        self.inputs = [str(p) for p in inputs]
+        self.outputs = [str(p) for p in outputs]
+        self.config = config or {}
+        self.code = [str(p) for p in code]
+        self.extra = extra
+        self.on_hit = on_hit
+
+    def key(self) -> str:
+        digest = hashlib.sha256(self.name.encode())
+        for path in self.inputs:
+            digest.update(os.path.relpath(path, APP_BASE_DIR).encode())
+            digest.update(file_digest(path).encode() if os.path.exists(path) else b"missing")
+        for path in self.outputs:
+            digest.update(os.path.relpath(path, APP_BASE_DIR).encode())
+        digest.update(json.dumps(self.config, sort_keys=True, default=str).encode())
+        for path in self.code:
+            digest.update(file_digest(path).encode())
+        if self.extra:
+            digest.update(self.extra.encode())
+        return digest.hexdigest()
+
+
+class StageCache:
+    """
+    Content-addressed cache of stage outputs.
+
+    Output files are stored once under objects/<sha256>; each stage run
+    writes a manifest keyed by the stage key that maps output paths to
+    their digests. A stage whose key has a manifest is skipped and its
+    outputs are restored from the objects, so switching back to an older
+    set of params or data is a hit too.
+    """
+
+    def __init__(self, cache_dir=STAGE_CACHE_DIR, enabled: bool = True):
+        self.cache_dir = str(cache_dir)
+        self.objects_dir = os.path.join(self.cache_dir, "objects")
+        self.manifests_dir = os.path.join(self.cache_dir, "manifests")
+        self.enabled = enabled
+        self.summary: List[Dict] = []
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+
+    def _manifest_path(self, stage: Stage, key: str) -> str:
+        return os.path.join(self.manifests_dir, f"{stage.name}-{key}.json")
+
+    def _store(self, path: str) -> str:
+        digest = file_digest(path)
+        target = os.path.join(self.objects_dir, digest)
+        if not os.path.exists(target):
+            shutil.copy2(path, f"{target}.tmp")
+            os.replace(f"{target}.tmp", target)
+        return digest
+
+    def _restore(self, manifest: dict) -> bool:
+        outputs = manifest["outputs"]
+        if not all(os.path.exists(os.path.join(self.objects_dir, d)) for d in outputs.values()):
+            return False
+
+        for rel_path, digest in outputs.items():
+            path = os.path.join(APP_BASE_DIR, rel_path)
+            if os.path.exists(path) and file_digest(path) == digest:
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            shutil.copy2(os.path.join(self.objects_dir, digest), path)
+            logger.info(f"Restored {rel_path} from the stage cache")
+        return True
+
+    def _record(self, stage: Stage, key: str):
+        missing = [path for path in stage.outputs if not os.path.exists(path)]
+        if missing:
+            logger.warning(f"Stage {stage.name} did not produce {missing}, not caching it")
+            return
+
+        outputs = {os.path.relpath(path, APP_BASE_DIR): self._store(path) for path in stage.outputs}
+        with open(self._manifest_path(stage, key), "w") as f:
+            json.dump({"stage": stage.name, "key": key, "created_at": time.time(), "outputs": outputs}, f, indent=4)
+
+    def run(self, stage: Stage):
+        try:
+            reset_peak_rss()
+            start = time.perf_counter()
+            key = stage.key()
+            manifest_path = self._manifest_path(stage, key)
+
+            hit = False
+            if self.enabled and os.path.exists(manifest_path):
+                with open(manifest_path) as f:
+                    hit = self._restore(json.load(f))
+
+            if hit:
+                logger.info(f"Stage {stage.name} is up to date ({key[:12]}), skipping")
+                if stage.on_hit is not None:
+                    stage.on_hit()
+            else:
+                logger.info(f"Running stage {stage.name} ({key[:12]})")
+                stage.run()
+                # downstream keys hash these outputs, so record them even
+                # when the cache is disabled for this run
+                self._record(stage, key)
+
+            self.summary.append({
+                "stage": stage.name,
+                "cache": "hit" if hit else "miss",
+                "seconds": time.perf_counter() - start,
+                "peak_rss_mb": peak_rss_mb(),
+                "key": key[:12],
+            })
+
+        except Exception as e:
+            logger.error(f"Error while running stage {stage.name} : {e}")
+            raise CustomException(f"Failed to run stage {stage.name}", e)
+
+    def report(self) -> str:
+        lines = [f"{'stage':<16}{'cache':<8}{'seconds':>10}{'peak MB':>10}  key"]
+        for row in self.summary:
+            lines.append(f"{row['stage']:<16}{row['cache']:<8}{row['seconds']:>10.2f}{row['peak_rss_mb']:>10.0f}  {row['key']}")
+        total = sum(row["seconds"] for row in self.summary)
+        lines.append(f"{'total':<24}{total:>10.2f}")
+        return "\n".join(lines)
@@ -1,30 +1,78 @@
+import argparse
+
 from app.config.paths_config import *
-from app.utils.file_handler import read_yaml
+from app.utils.file_handler import read_yaml, schema_dtypes
+from app.utils.logger import AppLogger
 from app.srv.data_ingestion import DataIngestion
 from app.srv.data_preprocessing import DataProcessor
 from app.srv.model_training import ModelTraining
+from app.pipeline.stage_cache import Stage, StageCache
+
+
+logger = AppLogger(__name__)()
+
+SRV_DIR = APP_BASE_DIR / "app/srv"
+CONFIG_DIR = APP_BASE_DIR / "app/config"
+FILE_HANDLER = APP_BASE_DIR / "app/utils/file_handler.py"
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the training pipeline, skipping stages whose inputs did not change")
+    parser.add_argument("--no-cache", action="store_true", help="rerun every stage")
+    parser.add_argument("--incremental", nargs="?", const=NEW_PARTITION_PATH, metavar="PARTITION",
+                        help="continue boosting the current model on a new raw partition instead of retraining")
+    args = parser.parse_args()
+
+    if args.incremental:
+        ## Incremental Training
+
+        trainer = ModelTraining(PROCESSED_TRAIN_DATA_PATH, PROCESSED_TEST_DATA_PATH, MODEL_OUTPUT_PATH)
+        promoted = trainer.run_incremental(args.incremental)
+        logger.info(f"Incremental training {'promoted a new model version' if promoted else 'kept the current model'}")
+        raise SystemExit(0)
 
-    ## Data Ingestion
     config = read_yaml(CONFIG_PATH)
+    cache = StageCache(enabled=not args.no_cache)
+
+    ## Data Ingestion
 
     data_ingestion = DataIngestion(config)
 
-    data_ingestion.run()
+    cache.run(Stage(
+        "ingestion", data_ingestion.run,
+        outputs=[RAW_FILE_PATH, TRAIN_FILE_PATH, TEST_FILE_PATH],
+        config={**config["data_ingestion"], "schema": schema_dtypes(config["data_processing"])},
+        code=[SRV_DIR / "data_ingestion.py", SRV_DIR / "object_storage.py", FILE_HANDLER],
+        extra=data_ingestion.source_fingerprint(),
+    ))
 
     ## Data Processing
 
     processor = DataProcessor(TRAIN_FILE_PATH, TEST_FILE_PATH,
             PROCESSED_DIR, CONFIG_PATH)
 
-    processor.process()
-
+    cache.run(Stage(
+        "processing", processor.process,
+        inputs=[TRAIN_FILE_PATH, TEST_FILE_PATH],
+        outputs=[PROCESSED_TRAIN_DATA_PATH, PROCESSED_TEST_DATA_PATH, PROCESSED_TRANSFORMER_PATH],
+        config=config["data_processing"],
+        code=[SRV_DIR / "data_preprocessing.py", SRV_DIR / "feature_transformer.py", SRV_DIR / "balancing.py",
+              SRV_DIR / "feature_ranking.py", FILE_HANDLER],
+    ))
 
     ## Model Training
 
     trainer = ModelTraining(PROCESSED_TRAIN_DATA_PATH, PROCESSED_TEST_DATA_PATH, MODEL_OUTPUT_PATH)
 
-    trainer.run()
+    cache.run(Stage(
+        "training", trainer.run,
+        inputs=[PROCESSED_TRAIN_DATA_PATH, PROCESSED_TEST_DATA_PATH, PROCESSED_TRANSFORMER_PATH],
+        outputs=[MODEL_OUTPUT_PATH, COMPILED_MODEL_OUTPUT_PATH, TRANSFORMER_OUTPUT_PATH, FEATURES_PATH],
+        config={"balancing": config["data_processing"].get("balancing")},
+        code=[SRV_DIR / "model_training.py", SRV_DIR / "hyperparameter_search.py",
+              SRV_DIR / "compiled_model.py", CONFIG_DIR / "model_params.py", FILE_HANDLER],
+        # the registry serves versions/<id>, not the flat files restored here
+        on_hit=trainer.republish_version,
+    ))
 
+    logger.info("Pipeline summary\n" + cache.report())
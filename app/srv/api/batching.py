@@ -0,0 +1,99 @@
+import asyncio
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from .executor import REJECTED, Overloaded
+from app.utils.logger import AppLogger
+from app.utils.metrics import REGISTRY
+
+logger = AppLogger(__name__)()
+
+BATCH_SIZE = REGISTRY.histogram(
+    "micro_batch_size",
+    "Number of single-row requests flushed to the model together",
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128, 256, 512],
+)
+QUEUE_WAIT = REGISTRY.histogram(
+    "micro_batch_queue_wait_seconds",
+    "Time a request spends queued before its batch is flushed",
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25],
+)
+
+
+class MicroBatcher:
+    """
+    Collects single-row prediction requests and flushes them to the model
+    in one vectorized call, either when `max_batch_size` rows are queued or
+    `window_ms` after the first row of the batch arrived. At most
+    `max_queue` rows wait; further rows are rejected with Overloaded.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], np.ndarray], max_batch_size: int, window_ms: float,
+                 max_queue: int = 0, executor=None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+        self.max_queue = max_queue
+        self.run_model = executor.run if executor is not None else run_in_threadpool
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_started(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue(self.max_queue)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Micro-batcher started (max_batch_size={self.max_batch_size}, window={self.window * 1000}ms)")
+
+    async def submit(self, row: np.ndarray) -> np.ndarray:
+        """Queue a (1, n_features) row and wait for its model output."""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((row, time.perf_counter(), future))
+        except asyncio.QueueFull:
+            REJECTED.inc(reason="queue_full")
+            raise Overloaded("queue_full")
+        return await future
+
+    async def _collect(self) -> List[Tuple[np.ndarray, float, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.window
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[np.ndarray, float, asyncio.Future]]):
+        flushed_at = time.perf_counter()
+        BATCH_SIZE.observe(len(batch))
+        for _, enqueued_at, _ in batch:
+            QUEUE_WAIT.observe(flushed_at - enqueued_at)
+
+        try:
+            X = np.concatenate([row for row, _, _ in batch])
+            outputs = await self.run_model(self.predict_fn, X)
+        except Exception as e:
+            if not isinstance(e, Overloaded):
+                logger.error(f"Micro-batch of {len(batch)} rows failed : {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for i, (_, _, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(outputs[i])
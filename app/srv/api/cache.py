@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional
+
+import numpy as np
+
+from app.utils.logger import AppLogger
+from app.utils.metrics import REGISTRY
+
+logger = AppLogger(__name__)()
+
+CACHE_HITS = REGISTRY.counter("prediction_cache_hits", "Rows answered from the prediction cache")
+CACHE_MISSES = REGISTRY.counter("prediction_cache_misses", "Rows that had to be scored by the model")
+CACHE_SIZE = REGISTRY.gauge("prediction_cache_entries", "Entries currently held in the prediction cache")
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache with a per-entry TTL mapping canonicalized feature
+    rows to model outputs. Entries are tied to a model version and the
+    whole cache is dropped when a different version is bound.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self.model_version: Optional[str] = None
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def bind(self, model_version: str):
+        with self._lock:
+            if model_version != self.model_version:
+                if self.model_version is not None:
+                    logger.info(f"Model changed to {model_version}, clearing {len(self._entries)} cached predictions")
+                self._entries.clear()
+                self.model_version = model_version
+                CACHE_SIZE.set(0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        CACHE_SIZE.set(0)
+
+    @staticmethod
+    def keys_for(X: np.ndarray) -> List[bytes]:
+        """
+        One key per row: the raw bytes of the row as float32 (the batch
+        matrix dtype), with -0.0 folded into 0.0, so single and batch
+        requests for the same reservation share an entry.
+        """
+        rows = np.ascontiguousarray(X, dtype=np.float32) + np.float32(0.0)
+        return rows.view(np.dtype((np.void, rows.itemsize * rows.shape[1]))).ravel().tolist()
+
+    def get_many(self, keys: List[Hashable]) -> List[Optional[Any]]:
+        now = time.monotonic()
+        results = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    results.append(entry[1])
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    results.append(None)
+            size = len(self._entries)
+
+        hits = sum(result is not None for result in results)
+        CACHE_HITS.inc(hits)
+        CACHE_MISSES.inc(len(keys) - hits)
+        CACHE_SIZE.set(size)
+        return results
+
+    def put_many(self, keys: List[Hashable], values: List[Any], model_version: Optional[str] = None):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            # results scored by a model that was swapped out meanwhile
+            if model_version is not None and model_version != self.model_version:
+                return
+            for key, value in zip(keys, values):
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            size = len(self._entries)
+        CACHE_SIZE.set(size)
+
+    def stats(self) -> dict:
+        return {
+            "model_version": self.model_version,
+            "entries": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": CACHE_HITS.value(),
+            "misses": CACHE_MISSES.value(),
+        }
@@ -0,0 +1,182 @@
+import importlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from . import fastpath
+from .dto import CATEGORICAL_COLUMNS, FEATURE_COLUMNS
+from .fastpath import PayloadError
+
+
+class UnsupportedMediaType(Exception):
+    """Raised when a request asks for a format this service cannot read or write."""
+
+
+class JSONCodec:
+    media_type = "application/json"
+    aliases = ()
+    # library imported on first use, None when nothing beyond the serve path
+    requires = None
+
+    def decode(self, body: bytes, transformer=None) -> np.ndarray:
+        return fastpath.parse_batch(body, transformer)
+
+    def encode(self, result: dict) -> bytes:
+        return fastpath.dumps(result)
+
+
+class MsgpackCodec:
+    """Same document layouts as JSON, packed with msgpack."""
+
+    media_type = "application/msgpack"
+    aliases = ("application/x-msgpack",)
+    requires = "msgpack"
+
+    @staticmethod
+    def _msgpack():
+        try:
+            import msgpack
+        except ImportError:
+            raise UnsupportedMediaType("msgpack is not installed on this server")
+        return msgpack
+
+    def decode(self, body: bytes, transformer=None) -> np.ndarray:
+        msgpack = self._msgpack()
+        try:
+            payload = msgpack.unpackb(body, raw=False)
+        except Exception as e:
+            raise PayloadError(f"Invalid msgpack body : {e}")
+        return fastpath.matrix_from_payload(payload, transformer)
+
+    def encode(self, result: dict) -> bytes:
+        return self._msgpack().packb(result, use_bin_type=True)
+
+
+class ArrowCodec:
+    """
+    Arrow IPC stream. The request table carries either one numeric column
+    per feature, or a single fixed-size-list column named "features" whose
+    float32 values buffer is viewed as the feature matrix without copying
+    (unless log-transformed features need a writable copy).
+    Per-feature categorical columns may be string typed when a transformer
+    is given.
+    """
+
+    media_type = "application/vnd.apache.arrow.stream"
+    aliases = ("application/vnd.apache.arrow",)
+    requires = "pyarrow"
+
+    @staticmethod
+    def _pyarrow():
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise UnsupportedMediaType("pyarrow is not installed on this server")
+        return pa
+
+    def decode(self, body: bytes, transformer=None) -> np.ndarray:
+        pa = self._pyarrow()
+        try:
+            table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+        except Exception as e:
+            raise PayloadError(f"Invalid Arrow IPC stream : {e}")
+
+        fastpath.check_size(table.num_rows)
+
+        if "features" in table.column_names:
+            return fastpath.finish(self._matrix_from_list_column(pa, table.column("features")), transformer)
+
+        missing = [col for col in FEATURE_COLUMNS if col not in table.column_names]
+        if missing:
+            raise PayloadError(f"Missing columns {missing}")
+
+        X = np.empty((table.num_rows, len(FEATURE_COLUMNS)), dtype=np.float32)
+        for j, col in enumerate(FEATURE_COLUMNS):
+            column = table.column(col)
+            if column.null_count:
+                raise PayloadError(f"Column '{col}' contains nulls")
+            if col in CATEGORICAL_COLUMNS and (pa.types.is_string(column.type) or pa.types.is_large_string(column.type)):
+                X[:, j] = fastpath.encode(transformer, col, column.to_numpy(zero_copy_only=False))
+                continue
+            try:
+                X[:, j] = column.to_numpy()
+            except (TypeError, ValueError, pa.ArrowException) as e:
+                raise PayloadError(f"Column '{col}' is not numeric : {e}")
+        return fastpath.finish(X, transformer)
+
+    @staticmethod
+    def _matrix_from_list_column(pa, column) -> np.ndarray:
+        n_features = len(FEATURE_COLUMNS)
+        array = column.combine_chunks()
+
+        if not pa.types.is_fixed_size_list(array.type) or array.type.list_size != n_features:
+            raise PayloadError(f"Column 'features' must be a fixed_size_list<{n_features}>")
+        if array.null_count or array.values.null_count:
+            raise PayloadError("Column 'features' contains nulls")
+
+        values = array.flatten()
+        if pa.types.is_float32(values.type):
+            return values.to_numpy(zero_copy_only=True).reshape(-1, n_features)
+        return values.to_numpy().astype(np.float32).reshape(-1, n_features)
+
+    def encode(self, result: dict) -> bytes:
+        pa = self._pyarrow()
+        table = pa.table(
+            {
+                "prediction": pa.array(result["predictions"], type=pa.string()),
+                "probability": pa.array(result["probabilities"], type=pa.float64()),
+            },
+            metadata={"model_version": str(result["model_version"])},
+        )
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+
+JSON = JSONCodec()
+CODECS: Dict[str, object] = {}
+for _codec in (JSON, MsgpackCodec(), ArrowCodec()):
+    for _media_type in (_codec.media_type, *_codec.aliases):
+        CODECS[_media_type] = _codec
+
+
+def unavailable() -> List[str]:
+    """Advertised media types whose library cannot be imported on this server."""
+    missing = []
+    for codec in dict.fromkeys(CODECS.values()):
+        if codec.requires is None:
+            continue
+        try:
+            importlib.import_module(codec.requires)
+        except ImportError:
+            missing.append(codec.media_type)
+    return missing
+
+
+def _media_type(header: str) -> str:
+    return header.split(";", 1)[0].strip().lower()
+
+
+def for_content_type(content_type: Optional[str]):
+    """Codec for a request body; JSON when no Content-Type is sent."""
+    if not content_type:
+        return JSON
+    codec = CODECS.get(_media_type(content_type))
+    if codec is None:
+        raise UnsupportedMediaType(f"Unsupported Content-Type '{content_type}'")
+    return codec
+
+
+def for_accept(accept: Optional[str], default):
+    """
+    Codec for the response: the first supported type listed in Accept,
+    otherwise the request's own format.
+    """
+    if accept:
+        for media_range in accept.split(","):
+            codec = CODECS.get(_media_type(media_range))
+            if codec is not None:
+                return codec
+    return default
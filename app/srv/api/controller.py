@@ -1,24 +1,271 @@
-from fastapi import APIRouter, HTTPException
-from typing import Any
-import joblib
+from fastapi import APIRouter, HTTPException, Header, Request
+from fastapi.responses import Response
+from typing import Any, List, Optional, Tuple
+import numpy as np
 
-from .dto import PredictionInput
-from app.config.paths_config import MODEL_OUTPUT_PATH
+from .dto import PredictionInput, BatchPredictionInput
+from . import fastpath, codecs, instrumentation
+from .batching import MicroBatcher
+from .cache import PredictionCache
+from .executor import InferenceExecutor, Overloaded
+from .registry import ModelRegistry
+from .shadow import ShadowScorer
+from app.config.secrets import SecretManager
 
-model = joblib.load(MODEL_OUTPUT_PATH)
+
+cache = PredictionCache(
+    max_size=SecretManager.PREDICTION_CACHE_SIZE,
+    ttl_seconds=SecretManager.PREDICTION_CACHE_TTL_SECONDS,
+)
+
+# model calls run here rather than in Starlette's shared threadpool
+executor = InferenceExecutor()
+
+registry = ModelRegistry()
+registry.on_swap(lambda loaded: cache.bind(loaded.identity))
+registry.on_swap(instrumentation.track_model)
+# loaded by the app's lifespan (app.srv.api.lifecycle), or by the
+# pre-forking parent before it forks the workers
+shadow = ShadowScorer(registry)
 
 router = APIRouter(prefix="/api", tags=["Prediction"])
+admin_router = APIRouter(prefix="/api/admin", tags=["Admin"])
+
+
+def _score_live(X_input: np.ndarray, cached: bool) -> Tuple[np.ndarray, np.ndarray, str]:
+    """
+    Return the predicted labels, positive-class probabilities and the model
+    version used for every row of X_input. With `cached`, rows found in the
+    cache never reach the model.
+    """
+    current = registry.active
+    model = current.model
+
+    if not cached or not cache.enabled:
+        probabilities = model.predict_proba(X_input)
+        return model.classes_[probabilities.argmax(axis=1)], probabilities[:, 1], current.version
+
+    keys = cache.keys_for(X_input)
+    cached = cache.get_many(keys)
+
+    label_idx = np.empty(len(keys), dtype=np.intp)
+    positive = np.empty(len(keys), dtype=np.float64)
+    missing = []
+    for i, hit in enumerate(cached):
+        if hit is None:
+            missing.append(i)
+        else:
+            label_idx[i], positive[i] = hit
+
+    if missing:
+        probabilities = model.predict_proba(X_input[missing])
+        label_idx[missing] = probabilities.argmax(axis=1)
+        positive[missing] = probabilities[:, 1]
+        cache.put_many(
+            [keys[i] for i in missing],
+            list(zip(label_idx[missing].tolist(), positive[missing].tolist())),
+            model_version=current.identity,
+        )
+
+    return model.classes_[label_idx], positive, current.version
+
+
+def _score(X_input: np.ndarray, cached: bool = False) -> Tuple[np.ndarray, np.ndarray, str]:
+    """_score_live, with a sample of the rows queued for the shadow model."""
+    labels, positive, version = _score_live(X_input, cached)
+    shadow.offer(X_input, labels, positive, version)
+    return labels, positive, version
+
+
+def _predict_rows(X_input: np.ndarray) -> List[Tuple[Any, str]]:
+    # single-row requests, one at a time or micro-batched
+    labels, _, version = _score(X_input, cached=True)
+    return [(label, version) for label in labels.tolist()]
+
+
+batcher = MicroBatcher(
+    _predict_rows,
+    max_batch_size=SecretManager.MICRO_BATCH_MAX_SIZE,
+    window_ms=SecretManager.MICRO_BATCH_WINDOW_MS,
+    max_queue=SecretManager.INFERENCE_QUEUE_SIZE * SecretManager.MICRO_BATCH_MAX_SIZE,
+    executor=executor,
+) if SecretManager.MICRO_BATCHING_ENABLED else None
+
+
+def _predict_one(X_input: np.ndarray) -> Tuple[Any, str]:
+    return _predict_rows(X_input)[0]
+
+
+def _predict_matrix(X_input: np.ndarray) -> dict:
+    labels, probabilities, version = _score(X_input, cached=SecretManager.PREDICTION_CACHE_BATCH_ROUTES)
+    predictions = np.where(labels == 1, "Valid", "Invalid").tolist()
+    return {"predictions": predictions, "probabilities": probabilities.tolist(), "model_version": version}
+
+
+def _shed(e: Overloaded) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
 
 @router.post("/predict")
-def predict(payload: PredictionInput) -> Any:
+async def predict(payload: PredictionInput, request: Request) -> Any:
+    timer = instrumentation.phase_timer(request)
+    timer.mark("parse")
+    try:
+        X_input = payload.to_numpy(registry.active.transformer)
+        timer.mark("to_numpy")
+    except ValueError as e:
+        # unknown labels fail validation like on /predict/fast
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        if batcher is not None:
+            prediction, version = await batcher.submit(X_input)
+        else:
+            prediction, version = await executor.run(_predict_one, X_input)
+        timer.mark("predict")
+        timer.model_version = version
+
+        prediction = "Valid" if prediction == 1 else "Invalid"
+
+        return {"prediction": prediction, "model_version": version}
+
+    except Overloaded as e:
+        raise _shed(e)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/predict/batch")
+async def predict_batch(payload: BatchPredictionInput, request: Request) -> Any:
+    timer = instrumentation.phase_timer(request)
+    timer.mark("parse")
+    try:
+        X_input = payload.to_numpy(registry.active.transformer)
+        timer.mark("to_numpy")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        result = await executor.run(_predict_matrix, X_input)
+        timer.mark("predict")
+        timer.model_version = result["model_version"]
+        return result
+
+    except Overloaded as e:
+        raise _shed(e)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _json_response(content: dict) -> Response:
+    return Response(fastpath.dumps(content), media_type="application/json")
+
+
+@router.post("/predict/fast")
+async def predict_fast(request: Request) -> Any:
+    """
+    Same contract as /predict, but the raw JSON body is parsed and
+    validated straight into a NumPy row without building a PredictionInput.
+    """
+    timer = instrumentation.phase_timer(request)
     try:
-        X_input = payload.to_numpy()
-        
-        prediction = model.predict(X_input).tolist()[0]
+        body = await request.body()
+        timer.mark("parse")
+        X_input = fastpath.parse_single(body, registry.active.transformer)
+        timer.mark("to_numpy")
+    except fastpath.PayloadError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        if batcher is not None:
+            prediction, version = await batcher.submit(X_input)
+        else:
+            prediction, version = await executor.run(_predict_one, X_input)
+        timer.mark("predict")
+        timer.model_version = version
 
         prediction = "Valid" if prediction == 1 else "Invalid"
 
-        return {"prediction": prediction}
-    
+        return _json_response({"prediction": prediction, "model_version": version})
+
+    except Overloaded as e:
+        raise _shed(e)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/predict/batch/fast")
+async def predict_batch_fast(request: Request) -> Any:
+    """
+    Batch scoring from a raw body. JSON (default), msgpack and Arrow IPC
+    streams are accepted via Content-Type; the response uses the first
+    supported type in Accept, otherwise the request's format.
+    """
+    timer = instrumentation.phase_timer(request)
+    try:
+        request_codec = codecs.for_content_type(request.headers.get("content-type"))
+        response_codec = codecs.for_accept(request.headers.get("accept"), default=request_codec)
+        body = await request.body()
+        timer.mark("parse")
+        X_input = request_codec.decode(body, registry.active.transformer)
+        timer.mark("to_numpy")
+    except codecs.UnsupportedMediaType as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except fastpath.PayloadError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        result = await executor.run(_predict_matrix, X_input)
+        timer.mark("predict")
+        timer.model_version = result["model_version"]
+        return Response(response_codec.encode(result), media_type=response_codec.media_type)
+
+    except Overloaded as e:
+        raise _shed(e)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/predict/cache")
+def cache_stats() -> Any:
+    return cache.stats()
+
+
+@router.get("/predict/executor")
+def executor_stats() -> Any:
+    return executor.stats()
+
+
+def _check_admin_token(token: Optional[str]):
+    if SecretManager.ADMIN_TOKEN and token != SecretManager.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@admin_router.get("/model")
+def model_info(x_admin_token: Optional[str] = Header(default=None)) -> Any:
+    _check_admin_token(x_admin_token)
+    current = registry.active
+    return {
+        "active_version": current.version,
+        "artifact": current.path.name,
+        "loaded_at": current.loaded_at,
+        "available_versions": registry.available_versions(),
+    }
+
+
+@admin_router.get("/shadow")
+def shadow_stats(x_admin_token: Optional[str] = Header(default=None)) -> Any:
+    _check_admin_token(x_admin_token)
+    return shadow.stats()
+
+
+@admin_router.post("/model/reload", status_code=202)
+def reload_model(version: Optional[str] = None, x_admin_token: Optional[str] = Header(default=None)) -> Any:
+    _check_admin_token(x_admin_token)
+    try:
+        target, _ = registry.resolve(version)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    registry.reload(target)
+    return {"active_version": registry.active.version, "loading_version": target}
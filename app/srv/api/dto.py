@@ -1,33 +1,102 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
+from typing import Annotated, List, Union
 import numpy as np
+import json
+
+from app.config.paths_config import FEATURES_PATH
+from app.config.secrets import SecretManager
+
+# column order the model was trained with, as exported by ModelTraining
+with open(FEATURES_PATH) as f:
+    FEATURE_COLUMNS = tuple(json.load(f)["features"])
+
+Count = Annotated[int, Field(ge=0)]
+Code = Annotated[int, Field(ge=0)]
+Price = Annotated[float, Field(ge=0)]
+Month = Annotated[int, Field(ge=1, le=12)]
+DayOfMonth = Annotated[int, Field(ge=1, le=31)]
+# encoded integer code, or the raw label (e.g. "Meal Plan 1") when a
+# preprocessing artifact is loaded
+Category = Union[Code, str]
+
+CATEGORICAL_COLUMNS = ("market_segment_type", "type_of_meal_plan", "room_type_reserved")
+
+
+def encode_categorical(transformer, col: str, values):
+    if transformer is None:
+        raise ValueError(f"'{col}' labels need a preprocessing artifact, send the encoded integer instead")
+    return transformer.encode_column(col, values)
+
 
 class PredictionInput(BaseModel):
-    lead_time: int
-    no_of_special_requests: int
-    avg_price_per_room: float
-    arrival_month: int
-    arrival_date: int
-    market_segment_type: int
-    no_of_week_nights: int
-    no_of_weekend_nights: int
-    type_of_meal_plan: int
-    room_type_reserved: int
-
-    def to_numpy(self) -> np.ndarray:
+    lead_time: Count
+    no_of_special_requests: Count
+    avg_price_per_room: Price
+    arrival_month: Month
+    arrival_date: DayOfMonth
+    market_segment_type: Category
+    no_of_week_nights: Count
+    no_of_weekend_nights: Count
+    type_of_meal_plan: Category
+    room_type_reserved: Category
+
+    def to_numpy(self, transformer=None) -> np.ndarray:
+        """
+        Convert the input features into a float32 NumPy array of shape
+        (1, -1), like the batch and fast paths build, encoding categorical
+        labels and applying the fitted log1p when a transformer is given.
+        """
+        features = [getattr(self, col) for col in FEATURE_COLUMNS]
+        for j, col in enumerate(FEATURE_COLUMNS):
+            if isinstance(features[j], str):
+                features[j] = encode_categorical(transformer, col, [features[j]])[0]
+
+        X = np.array(features, dtype=np.float32).reshape(1, -1)
+        return transformer.apply_log(X, FEATURE_COLUMNS) if transformer else X
+
+
+class BatchPredictionInput(BaseModel):
+    """
+    Column-oriented batch of reservations: every field holds one value per
+    row, in request order.
+    """
+    lead_time: List[Count]
+    no_of_special_requests: List[Count]
+    avg_price_per_room: List[Price]
+    arrival_month: List[Month]
+    arrival_date: List[DayOfMonth]
+    market_segment_type: List[Category]
+    no_of_week_nights: List[Count]
+    no_of_weekend_nights: List[Count]
+    type_of_meal_plan: List[Category]
+    room_type_reserved: List[Category]
+
+    @model_validator(mode="after")
+    def check_batch_shape(self):
+        lengths = {len(getattr(self, col)) for col in FEATURE_COLUMNS}
+        if len(lengths) != 1:
+            raise ValueError("All feature columns must have the same number of rows")
+
+        n_rows = lengths.pop()
+        if n_rows == 0:
+            raise ValueError("Batch must contain at least one row")
+        if n_rows > SecretManager.MAX_BATCH_SIZE:
+            raise ValueError(f"Batch size {n_rows} exceeds the limit of {SecretManager.MAX_BATCH_SIZE}")
+        return self
+
+    def __len__(self) -> int:
+        return len(self.lead_time)
+
+    def to_numpy(self, transformer=None) -> np.ndarray:
         """
-        Convert the input features into a NumPy array of shape (1, -1)
-        suitable for model prediction.
+        Assemble the columns into one contiguous float32 matrix of shape
+        (n_rows, n_features), filled column by column. Categorical labels
+        go through the transformer's lookup table.
         """
-        features = [
-            self.lead_time,
-            self.no_of_special_requests,
-            self.avg_price_per_room,
-            self.arrival_month,
-            self.arrival_date,
-            self.market_segment_type,
-            self.no_of_week_nights,
-            self.no_of_weekend_nights,
-            self.type_of_meal_plan,
-            self.room_type_reserved,
-        ]
-        return np.array(features, dtype=float).reshape(1, -1)
+        X = np.empty((len(self), len(FEATURE_COLUMNS)), dtype=np.float32)
+        for j, col in enumerate(FEATURE_COLUMNS):
+            values = getattr(self, col)
+            if col in CATEGORICAL_COLUMNS and transformer is not None:
+                values = transformer.encode_column(col, values)
+            X[:, j] = values
+        return transformer.apply_log(X, FEATURE_COLUMNS) if transformer else X
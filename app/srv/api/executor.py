@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from app.config.secrets import SecretManager
+from app.utils.logger import AppLogger
+from app.utils.metrics import REGISTRY
+
+logger = AppLogger(__name__)()
+
+T = TypeVar("T")
+
+QUEUE_DEPTH = REGISTRY.gauge("inference_queue_depth", "Model calls waiting for an inference thread")
+RUNNING = REGISTRY.gauge("inference_running", "Model calls currently running on an inference thread")
+QUEUE_WAIT = REGISTRY.histogram(
+    "inference_queue_wait_seconds",
+    "Time a model call waits for an inference thread",
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5],
+)
+REJECTED = REGISTRY.counter(
+    "inference_rejected",
+    "Model calls shed instead of queued: queue_full when the queue was at capacity, "
+    "queue_timeout when one waited longer than the queue timeout",
+    labelnames=("reason",),
+)
+
+
+class Overloaded(Exception):
+    """The inference queue is saturated; the request should be retried later."""
+
+    def __init__(self, reason: str, status_code: int = SecretManager.INFERENCE_SHED_STATUS,
+                 retry_after: int = 1):
+        super().__init__(f"Server overloaded ({reason}), retry later")
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """
+    Dedicated thread pool for model calls, so they do not compete with
+    Starlette's shared threadpool, with a bounded queue in front of it.
+
+    A call is rejected right away when `max_queue` calls are already
+    waiting, and dropped before it runs if it waited longer than
+    `queue_timeout` (its client has most likely given up by then). Both
+    raise Overloaded, so latency stays bounded under overload and the
+    excess is shed instead of queued.
+    """
+
+    def __init__(self, workers: int = SecretManager.INFERENCE_WORKERS,
+                 max_queue: int = SecretManager.INFERENCE_QUEUE_SIZE,
+                 queue_timeout: float = SecretManager.INFERENCE_QUEUE_TIMEOUT_SECONDS):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+
+    def _ensure_pool(self) -> ThreadPoolExecutor:
+        # created lazily, in the process that serves: a pre-forked worker
+        # must not inherit the parent's threads
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+            logger.info(f"Inference executor started (workers={self.workers}, max_queue={self.max_queue}, "
+                        f"queue_timeout={self.queue_timeout}s)")
+        return self._pool
+
+    def _run(self, fn: Callable[..., T], args: tuple, enqueued_at: float) -> T:
+        waited = time.perf_counter() - enqueued_at
+        with self._lock:
+            self._queued -= 1
+            QUEUE_DEPTH.set(self._queued)
+            expired = self.queue_timeout > 0 and waited > self.queue_timeout
+            if not expired:
+                self._running += 1
+                RUNNING.set(self._running)
+        QUEUE_WAIT.observe(waited)
+
+        if expired:
+            REJECTED.inc(reason="queue_timeout")
+            raise Overloaded("queue_timeout")
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                RUNNING.set(self._running)
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        pool = self._ensure_pool()
+        with self._lock:
+            # calls beyond the free threads wait in the pool's queue
+            if self._queued + self._running >= self.workers + self.max_queue:
+                REJECTED.inc(reason="queue_full")
+                raise Overloaded("queue_full")
+            self._queued += 1
+            QUEUE_DEPTH.set(self._queued)
+
+        try:
+            future = pool.submit(self._run, fn, args, time.perf_counter())
+        except RuntimeError:
+            # the pool was shut down between _ensure_pool and submit
+            self._dequeue()
+            raise
+        # a call cancelled while still queued (client gone, or the shutdown's
+        # cancel_futures) never reaches _run, which would release its slot
+        future.add_done_callback(self._release_if_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _dequeue(self):
+        with self._lock:
+            self._queued -= 1
+            QUEUE_DEPTH.set(self._queued)
+
+    def _release_if_cancelled(self, future):
+        if future.cancelled():
+            self._dequeue()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "queued": self._queued,
+            "running": self._running,
+            "rejected": {reason: REJECTED.value(reason=reason) for reason in ("queue_full", "queue_timeout")},
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
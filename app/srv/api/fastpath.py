@@ -0,0 +1,226 @@
+import math
+from typing import Any, List, Tuple, get_args
+
+import numpy as np
+
+from .dto import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, PredictionInput, encode_categorical
+from app.config.secrets import SecretManager
+
+try:
+    import orjson as _json
+
+    _loads = _json.loads
+    dumps = _json.dumps
+except ImportError:
+    import json as _json
+
+    _loads = _json.loads
+
+    def dumps(content: Any) -> bytes:
+        return _json.dumps(content, separators=(",", ":")).encode()
+
+
+class PayloadError(ValueError):
+    """Raised when a raw request body does not satisfy the PredictionInput schema."""
+
+
+def _field_rules() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Derive per-column integer flags and bounds from PredictionInput, so the
+    fast path validates exactly what the pydantic DTO validates.
+    """
+    is_int, lower, upper = [], [], []
+    for col in FEATURE_COLUMNS:
+        field = PredictionInput.model_fields[col]
+        annotation, metadata = field.annotation, field.metadata
+
+        # Category is Union[Code, str]: labels are encoded before validation,
+        # so the numeric rules come from the Code member
+        numeric = [arg for arg in get_args(annotation) if arg is not str]
+        if numeric:
+            annotation, *extra = get_args(numeric[0])
+            metadata = [m for info in extra for m in info.metadata]
+        is_int.append(annotation is int)
+
+        lo, hi = -np.inf, np.inf
+        for constraint in metadata:
+            lo = getattr(constraint, "ge", lo)
+            hi = getattr(constraint, "le", hi)
+        lower.append(lo)
+        upper.append(hi)
+
+    return np.asarray(is_int), np.asarray(lower, dtype=np.float64), np.asarray(upper, dtype=np.float64)
+
+
+INT_COLUMNS, LOWER_BOUNDS, UPPER_BOUNDS = _field_rules()
+_ROW_RULES = list(zip(INT_COLUMNS.tolist(), LOWER_BOUNDS.tolist(), UPPER_BOUNDS.tolist()))
+CATEGORICAL_INDEX = [j for j, col in enumerate(FEATURE_COLUMNS) if col in CATEGORICAL_COLUMNS]
+
+
+def _reject(X: np.ndarray, row: int, col: int):
+    name = FEATURE_COLUMNS[col]
+    kind = "an integer" if INT_COLUMNS[col] else "a number"
+    raise PayloadError(
+        f"Row {row}, field '{name}': expected {kind} in "
+        f"[{LOWER_BOUNDS[col]}, {UPPER_BOUNDS[col]}], got {X[row, col]}"
+    )
+
+
+def validate(X: np.ndarray) -> np.ndarray:
+    if X.shape[0] == 1:
+        # a handful of scalar checks beat a dozen tiny NumPy calls
+        for col, (value, (is_int, lower, upper)) in enumerate(zip(X[0].tolist(), _ROW_RULES)):
+            if not (math.isfinite(value) and lower <= value <= upper and (not is_int or value.is_integer())):
+                _reject(X, 0, col)
+        return X
+
+    finite = np.isfinite(X)
+    integral = ~INT_COLUMNS | (np.floor(X) == X)
+    in_range = (X >= LOWER_BOUNDS) & (X <= UPPER_BOUNDS)
+
+    bad = ~(finite & integral & in_range)
+    if bad.any():
+        row, col = np.argwhere(bad)[0]
+        _reject(X, row, col)
+    return X
+
+
+def finish(X: np.ndarray, transformer=None) -> np.ndarray:
+    """Validate the raw feature values, then apply the fitted log1p."""
+    validate(X)
+    if transformer is None:
+        return X
+    if transformer.log_columns and not X.flags.writeable:
+        # a zero-copy view of the request buffer, apply_log writes in place
+        X = X.copy()
+    return transformer.apply_log(X, FEATURE_COLUMNS)
+
+
+def encode(transformer, col: str, values) -> np.ndarray:
+    try:
+        return encode_categorical(transformer, col, values)
+    except ValueError as e:
+        raise PayloadError(str(e))
+
+
+def check_size(n_rows: int):
+    if n_rows == 0:
+        raise PayloadError("Batch must contain at least one row")
+    if n_rows > SecretManager.MAX_BATCH_SIZE:
+        raise PayloadError(f"Batch size {n_rows} exceeds the limit of {SecretManager.MAX_BATCH_SIZE}")
+
+
+def _decode(body: bytes) -> Any:
+    try:
+        return _loads(body)
+    except ValueError as e:
+        raise PayloadError(f"Invalid JSON body : {e}")
+
+
+def _fill_columns(X: np.ndarray, columns: dict, transformer=None):
+    for j, col in enumerate(FEATURE_COLUMNS):
+        if col not in columns:
+            raise PayloadError(f"Missing field '{col}'")
+
+        values = columns[col]
+        # X[:, j] = values would broadcast a scalar or a one-element array
+        # over every row, BatchPredictionInput rejects both
+        if not isinstance(values, list) or len(values) != len(X):
+            raise PayloadError(f"Field '{col}' must be an array of {len(X)} values, like '{FEATURE_COLUMNS[0]}'")
+        if col in CATEGORICAL_COLUMNS and transformer is not None:
+            values = encode(transformer, col, values)
+        try:
+            X[:, j] = values
+        except (TypeError, ValueError) as e:
+            raise PayloadError(f"Field '{col}' is not numeric : {e}")
+
+
+def _matrix_from_labelled_rows(rows: List[List[Any]], transformer) -> np.ndarray:
+    # slow path for rows that carry categorical labels: encode those columns
+    # through the transformer, then cast the whole matrix
+    table = np.array(rows, dtype=object)
+    if table.ndim != 2 or table.shape[1] != len(FEATURE_COLUMNS):
+        raise PayloadError(f"Rows must be arrays of {len(FEATURE_COLUMNS)} values in order {list(FEATURE_COLUMNS)}")
+
+    for j in CATEGORICAL_INDEX:
+        table[:, j] = encode(transformer, FEATURE_COLUMNS[j], table[:, j])
+    try:
+        return table.astype(np.float32)
+    except (TypeError, ValueError) as e:
+        raise PayloadError(f"Non-categorical fields must be numeric : {e}")
+
+
+def matrix_from_rows(rows: List[List[Any]], transformer=None) -> np.ndarray:
+    """Array-of-arrays body, one inner array per row in FEATURE_COLUMNS order."""
+    check_size(len(rows))
+    try:
+        X = np.array(rows, dtype=np.float32)
+    except (TypeError, ValueError) as e:
+        if transformer is None:
+            raise PayloadError(f"Rows must be arrays of {len(FEATURE_COLUMNS)} numbers : {e}")
+        X = _matrix_from_labelled_rows(rows, transformer)
+
+    if X.ndim != 2 or X.shape[1] != len(FEATURE_COLUMNS):
+        raise PayloadError(f"Rows must be arrays of {len(FEATURE_COLUMNS)} numbers in order {list(FEATURE_COLUMNS)}")
+    return finish(X, transformer)
+
+
+def matrix_from_columns(columns: dict, transformer=None) -> np.ndarray:
+    """Columnar body, the same shape as BatchPredictionInput."""
+    first = columns.get(FEATURE_COLUMNS[0])
+    if not isinstance(first, list):
+        raise PayloadError(f"Field '{FEATURE_COLUMNS[0]}' must be an array")
+
+    n_rows = len(first)
+    check_size(n_rows)
+
+    X = np.empty((n_rows, len(FEATURE_COLUMNS)), dtype=np.float32)
+    _fill_columns(X, columns, transformer)
+    return finish(X, transformer)
+
+
+def parse_single(body: bytes, transformer=None) -> np.ndarray:
+    """Parse a PredictionInput JSON object straight into a (1, n_features) float32 row."""
+    payload = _decode(body)
+    if not isinstance(payload, dict):
+        raise PayloadError("Body must be a JSON object")
+
+    try:
+        values = [payload[col] for col in FEATURE_COLUMNS]
+    except KeyError as e:
+        raise PayloadError(f"Missing field {e}")
+
+    for j in CATEGORICAL_INDEX:
+        if isinstance(values[j], str):
+            values[j] = encode(transformer, FEATURE_COLUMNS[j], [values[j]])[0]
+
+    try:
+        X = np.array([values], dtype=np.float32)
+    except (TypeError, ValueError) as e:
+        raise PayloadError(f"All fields must be numeric : {e}")
+
+    if X.shape != (1, len(FEATURE_COLUMNS)):
+        raise PayloadError("All fields must be numeric scalars")
+    return finish(X, transformer)
+
+
+def matrix_from_payload(payload: Any, transformer=None) -> np.ndarray:
+    """
+    Build a (n_rows, n_features) float32 matrix from a decoded batch body:
+    the columnar BatchPredictionInput object, a bare array of rows, or
+    {"instances": [...rows...]}. Categorical fields may carry labels when
+    a transformer is given.
+    """
+    if isinstance(payload, list):
+        return matrix_from_rows(payload, transformer)
+    if isinstance(payload, dict) and "instances" in payload:
+        return matrix_from_rows(payload["instances"], transformer)
+    if isinstance(payload, dict):
+        return matrix_from_columns(payload, transformer)
+
+    raise PayloadError("Body must be an object or an array of rows")
+
+
+def parse_batch(body: bytes, transformer=None) -> np.ndarray:
+    """Parse a JSON batch body, see matrix_from_payload for accepted layouts."""
+    return matrix_from_payload(_decode(body), transformer)
@@ -0,0 +1,157 @@
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Dict, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+
+from app.config.secrets import SecretManager
+from app.utils.metrics import REGISTRY
+
+LATENCY_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "End-to-end request latency inside the app",
+    buckets=LATENCY_BUCKETS,
+    labelnames=("handler", "method", "status", "model_version"),
+)
+PHASE_LATENCY = REGISTRY.histogram(
+    "prediction_phase_seconds",
+    "Time a prediction request spends in each phase: parse, to_numpy, predict, encode",
+    buckets=LATENCY_BUCKETS,
+    labelnames=("handler", "phase", "model_version"),
+)
+IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "Requests currently being handled", labelnames=("handler",))
+MODEL_INFO = REGISTRY.gauge("model_info", "Number of workers serving each model version", labelnames=("model_version",))
+
+# route paths seen so far, so in-flight labels stay bounded before routing
+_route_paths: set = set()
+_serving_version: Optional[str] = None
+
+
+class PhaseTimer:
+    """
+    Splits the wall time of one request into consecutive phases: every
+    mark() closes the phase that began at the previous mark, or when the
+    request entered the app.
+    """
+
+    __slots__ = ("last", "phases", "model_version")
+
+    def __init__(self):
+        self.last = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.model_version: Optional[str] = None
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last
+        self.last = now
+
+
+class _NullTimer:
+    """Stands in when a handler is called without the middleware."""
+
+    model_version = None
+
+    def mark(self, phase: str):
+        pass
+
+
+def phase_timer(request: Request):
+    return getattr(request.state, "phase_timer", None) or _NullTimer()
+
+
+def handler_label(request: Request) -> str:
+    """The matched route path, or "other" for unknown paths so label values stay bounded."""
+    route = request.scope.get("route")
+    if route is not None:
+        _route_paths.add(route.path)
+        return route.path
+    path = request.scope["path"]
+    return path if path in _route_paths else "other"
+
+
+def track_model(loaded):
+    global _serving_version
+    if _serving_version is not None:
+        MODEL_INFO.set(0, model_version=_serving_version)
+    MODEL_INFO.set(1, model_version=loaded.version)
+    _serving_version = loaded.version
+
+
+class InstrumentationMiddleware:
+    """
+    Pure ASGI middleware: records in-flight requests, end-to-end latency
+    and the phases marked by the handler, and tags every response with the
+    model version it was served by. Whatever happens after the handler
+    returns (response serialization) counts as encode. Warm-up requests
+    sent by the app itself are not recorded.
+    """
+
+    def __init__(self, app, registry):
+        self.app = app
+        self.registry = registry
+
+    def _model_version(self) -> Optional[str]:
+        # before the first load (a cold start, /healthz) there is none to report
+        return self.registry.active.version if self.registry.loaded else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        model_version = self._model_version()
+
+        async def send_with_version(message):
+            if message["type"] == "http.response.start" and model_version is not None:
+                message.setdefault("headers", [])
+                MutableHeaders(scope=message)["X-Model-Version"] = model_version
+            await send(message)
+
+        if scope.get("warm_up"):
+            return await self.app(scope, receive, send_with_version)
+
+        request = Request(scope)
+        in_flight = handler_label(request)
+        timer = PhaseTimer()
+        request.state.phase_timer = timer
+        start = timer.last
+        status = 500
+
+        async def send_recording_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send_with_version(message)
+
+        IN_FLIGHT.inc(handler=in_flight)
+        try:
+            await self.app(scope, receive, send_recording_status)
+        finally:
+            IN_FLIGHT.dec(handler=in_flight)
+            handler = handler_label(request)
+            version = timer.model_version or model_version or "none"
+            if timer.phases:
+                timer.mark("encode")
+                for phase, seconds in timer.phases.items():
+                    PHASE_LATENCY.observe(seconds, handler=handler, phase=phase, model_version=version)
+            REQUEST_LATENCY.observe(time.perf_counter() - start, handler=handler, method=request.method,
+                                    status=status, model_version=version)
+
+
+def configure_multiprocess(directory: Optional[str] = None):
+    """
+    Merge /metrics across uvicorn workers. Workers are child processes of
+    the uvicorn supervisor, so by default they share a directory named
+    after it; a single-process server keeps metrics in memory. The prefork
+    server passes its own directory to every worker it forks.
+    """
+    directory = directory or SecretManager.METRICS_MULTIPROC_DIR
+    if not directory and multiprocessing.parent_process() is not None:
+        directory = os.path.join(tempfile.gettempdir(), f"hotel-reservation-metrics-{os.getppid()}")
+    if directory:
+        REGISTRY.enable_multiprocess(directory, SecretManager.METRICS_FLUSH_INTERVAL_SECONDS)
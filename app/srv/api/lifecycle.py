@@ -0,0 +1,246 @@
+import asyncio
+import json
+import os
+import statistics
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from . import fastpath
+from .dto import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, BatchPredictionInput, PredictionInput
+from app.config.secrets import SecretManager
+from app.utils.logger import AppLogger
+
+logger = AppLogger(__name__)()
+
+# value ranges of the synthetic warm-up rows, inside the DTO constraints
+SYNTHETIC_RANGES = {
+    "lead_time": (0, 300),
+    "no_of_special_requests": (0, 3),
+    "avg_price_per_room": (30.0, 250.0),
+    "arrival_month": (1, 12),
+    "arrival_date": (1, 28),
+    "no_of_week_nights": (0, 5),
+    "no_of_weekend_nights": (0, 2),
+}
+# sent once through the whole app after the warm-up rounds: FastAPI builds
+# a route's handler state on its first request, and the first threadpool
+# call imports the anyio backend and starts a worker thread
+PRIMED_ROUTES = ("/api/predict", "/api/predict/fast", "/api/predict/batch", "/api/predict/batch/fast")
+
+
+def pin_threads(threads: int = SecretManager.SERVE_THREADS):
+    """
+    Cap OpenMP threads for this process and the workers it forks. LightGBM
+    reads the variable when its pool starts, which happens only once a
+    pickled model is loaded, so this must run before the first load.
+    """
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    logger.info(f"Serving with {threads} OpenMP thread(s) per process")
+
+
+class WarmUp:
+    """
+    Synthetic requests through the serving path (JSON parsing, validation,
+    label encoding and predict_proba) for every configured batch size,
+    repeated in rounds until the latency of each size changes by less than
+    `tolerance` from one round to the next. The first calls pay for lazy
+    thread pool setup, allocator growth and cold caches; once the rounds
+    agree, real traffic sees steady-state latency.
+    """
+
+    def __init__(self, batch_sizes: List[int] = SecretManager.WARMUP_BATCH_SIZES,
+                 max_rounds: int = SecretManager.WARMUP_MAX_ROUNDS,
+                 tolerance: float = SecretManager.WARMUP_SETTLE_TOLERANCE, repeats: int = 3, seed: int = 0):
+        self.batch_sizes = sorted(set(min(size, SecretManager.MAX_BATCH_SIZE) for size in batch_sizes if size > 0))
+        self.max_rounds = max(2, max_rounds)
+        self.tolerance = tolerance
+        self.repeats = repeats
+        self.rng = np.random.default_rng(seed)
+
+    def columns(self, n_rows: int, transformer) -> dict:
+        columns = {}
+        for col in FEATURE_COLUMNS:
+            if col in CATEGORICAL_COLUMNS:
+                labels = transformer.classes.get(col) if transformer is not None else None
+                columns[col] = self.rng.choice(labels, n_rows).tolist() if labels else [0] * n_rows
+            else:
+                low, high = SYNTHETIC_RANGES[col]
+                if isinstance(low, float):
+                    columns[col] = self.rng.uniform(low, high, n_rows).round(2).tolist()
+                else:
+                    columns[col] = self.rng.integers(low, high, n_rows, endpoint=True).tolist()
+        return columns
+
+    def _request(self, loaded, n_rows: int):
+        transformer = loaded.transformer
+        columns = self.columns(n_rows, transformer)
+        if n_rows == 1:
+            row = {col: values[0] for col, values in columns.items()}
+            body = json.dumps(row).encode()
+            PredictionInput.model_validate_json(body).to_numpy(transformer)
+            X = fastpath.parse_single(body, transformer)
+        else:
+            body = json.dumps(columns).encode()
+            BatchPredictionInput.model_validate_json(body).to_numpy(transformer)
+            X = fastpath.parse_batch(body, transformer)
+        loaded.model.predict_proba(X)
+
+    def _round(self, loaded) -> Dict[int, float]:
+        latency = {}
+        for size in self.batch_sizes:
+            timings = []
+            for _ in range(self.repeats):
+                start = time.perf_counter()
+                self._request(loaded, size)
+                timings.append(time.perf_counter() - start)
+            latency[size] = statistics.median(timings)
+        return latency
+
+    def _settled(self, previous: Dict[int, float], current: Dict[int, float]) -> bool:
+        return all(abs(current[size] - previous[size]) <= self.tolerance * previous[size] for size in current)
+
+    def run(self, loaded) -> dict:
+        start = time.perf_counter()
+        rounds = [self._round(loaded)]
+        settled = False
+        while not settled and len(rounds) < self.max_rounds:
+            rounds.append(self._round(loaded))
+            settled = self._settled(rounds[-2], rounds[-1])
+
+        report = {
+            "settled": settled,
+            "rounds": len(rounds),
+            "seconds": round(time.perf_counter() - start, 3),
+            "first_round_ms": {size: round(seconds * 1000, 3) for size, seconds in rounds[0].items()},
+            "latency_ms": {size: round(seconds * 1000, 3) for size, seconds in rounds[-1].items()},
+        }
+
+        message = (f"model {loaded.version} after {report['rounds']} rounds in {report['seconds']}s, "
+                   f"latency by batch size {report['latency_ms']} ms (first round {report['first_round_ms']} ms)")
+        if settled:
+            logger.info(f"Warm-up settled for {message}")
+        else:
+            logger.warning(f"Warm-up did not settle within tolerance {self.tolerance} for {message}")
+        return report
+
+
+class Lifecycle:
+    """
+    Startup and shutdown of a serving process, and the state behind the
+    probes: live while the process answers, ready once the model is loaded
+    and the warm-up has settled, and not ready again while shutting down.
+
+    The lifespan blocks until warm-up ends, so a worker only starts
+    accepting connections once it is warm. When the rounds did not settle,
+    the worker reruns the warm-up in the background, up to `settle_retries`
+    times, and turns ready once it settles or, with a warning, once the
+    retries are used up.
+    """
+
+    def __init__(self, registry, cache=None, executor=None, shadow=None, warm_up: Optional[WarmUp] = None,
+                 settle_retries: int = SecretManager.WARMUP_SETTLE_RETRIES):
+        self.registry = registry
+        self.cache = cache
+        self.executor = executor
+        self.shadow = shadow
+        self.warm_up = warm_up or WarmUp()
+        self.settle_retries = max(0, settle_retries)
+        self.ready = False
+        self.started_at = time.time()
+        self.warm_up_report: Optional[dict] = None
+        self._settling: Optional[asyncio.Task] = None
+
+    def load_model(self):
+        """
+        Load the model (and the shadow candidate) unless this process already
+        has it: a pre-forking parent loads (and watches for new versions)
+        once, before forking.
+        """
+        if self.registry.loaded:
+            return
+        pin_threads(self.registry.threads)
+        self.registry.load()
+        self.registry.watch(SecretManager.MODEL_WATCH_INTERVAL_SECONDS)
+        if self.shadow is not None:
+            self.shadow.load()
+
+    async def _request(self, app, path: str, body: bytes) -> int:
+        """One in-process request through the app, flagged so metrics skip it."""
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+            "client": ("127.0.0.1", 0), "server": ("localhost", SecretManager.PORT), "state": {},
+            "warm_up": True,
+        }
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+        status = 0
+
+        async def receive():
+            return messages.pop() if messages else {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await app(scope, receive, send)
+        return status
+
+    async def prime_routes(self, app):
+        columns = self.warm_up.columns(1, self.registry.active.transformer)
+        bodies = {
+            False: json.dumps({col: values[0] for col, values in columns.items()}).encode(),
+            True: json.dumps(columns).encode(),
+        }
+        for path in PRIMED_ROUTES:
+            status = await self._request(app, path, bodies["batch" in path])
+            if status != 200:
+                logger.warning(f"Warm-up request to {path} answered {status}")
+        if self.cache is not None:
+            self.cache.clear()
+
+    async def _settle(self):
+        # off the event loop, so the probes keep answering meanwhile
+        for _ in range(self.settle_retries):
+            self.warm_up_report = await asyncio.to_thread(self.warm_up.run, self.registry.active)
+            if self.warm_up_report["settled"]:
+                break
+        else:
+            logger.warning(f"Warm-up still unsettled after {self.settle_retries} retries, "
+                           f"serving with latency {self.warm_up_report['latency_ms']} ms")
+        self.ready = True
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        self.load_model()
+        self.warm_up_report = self.warm_up.run(self.registry.active)
+        await self.prime_routes(app)
+        # started after the warm-up so synthetic requests stay out of the comparison
+        if self.shadow is not None:
+            self.shadow.start()
+        if self.warm_up_report["settled"]:
+            self.ready = True
+        else:
+            self._settling = asyncio.create_task(self._settle())
+        yield
+        self.ready = False
+        if self._settling is not None:
+            self._settling.cancel()
+        if self.shadow is not None:
+            self.shadow.stop()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def health(self) -> dict:
+        return {"status": "ok", "uptime_seconds": round(time.time() - self.started_at, 3)}
+
+    def readiness(self) -> dict:
+        return {
+            "ready": self.ready and self.registry.loaded,
+            "model_version": self.registry.active.version if self.registry.loaded else None,
+            "warm_up": self.warm_up_report,
+        }
@@ -0,0 +1,241 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config.paths_config import (MODEL_DIR, MODEL_VERSIONS_DIR, MODEL_OUTPUT_PATH,
+                                     COMPILED_MODEL_OUTPUT_PATH, TRANSFORMER_OUTPUT_PATH)
+from app.config.secrets import SecretManager
+from app.srv.compiled_model import CompiledForest
+from app.srv.feature_transformer import FeatureTransformer
+from app.utils.logger import AppLogger
+from app.utils.error import CustomException
+
+logger = AppLogger(__name__)()
+
+
+def artifact_version(path) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+class LoadedModel:
+
+    def __init__(self, version: str, model, path: Path, transformer: Optional[FeatureTransformer] = None):
+        self.version = version
+        self.model = model
+        self.path = Path(path)
+        self.transformer = transformer
+        self.fingerprint = artifact_version(path)
+        self.loaded_at = time.time()
+
+    @property
+    def identity(self) -> str:
+        """Version plus artifact fingerprint, so an overwritten legacy artifact counts as new."""
+        return f"{self.version}@{self.fingerprint}"
+
+    @property
+    def n_features(self) -> int:
+        if isinstance(self.model, CompiledForest):
+            return len(self.model.feature_names)
+        return self.model.n_features_in_
+
+
+class ModelRegistry:
+    """
+    Holds the model currently serving traffic and swaps in new versions
+    without blocking requests.
+
+    Versions live in MODEL_DIR/versions/<version>/; when none exist the
+    flat artifacts in MODEL_DIR are served as a single "legacy" version.
+    A replacement is loaded and warmed up on a background thread, then
+    published with a single reference assignment, so requests that
+    already grabbed `active` finish on the model they started with.
+    """
+
+    def __init__(self, model_dir: Path = MODEL_DIR, backend: str = SecretManager.MODEL_BACKEND,
+                 warmup_rows: int = SecretManager.MODEL_WARMUP_ROWS, threads: int = SecretManager.SERVE_THREADS):
+        self.model_dir = Path(model_dir)
+        self.versions_dir = self.model_dir / MODEL_VERSIONS_DIR.name
+        self.backend = backend
+        self.warmup_rows = warmup_rows
+        self.threads = threads
+
+        self._active: Optional[LoadedModel] = None
+        # version explicitly requested through reload(); None follows the newest
+        self._pinned: Optional[str] = None
+        self._reload_lock = threading.Lock()
+        # set in pre-forked workers, where the parent owns the model
+        self._forward_reload: Optional[Callable[[Optional[str]], None]] = None
+        self._listeners: List[Callable[[LoadedModel], None]] = []
+        self._watcher: Optional[threading.Thread] = None
+
+    @property
+    def active(self) -> LoadedModel:
+        if self._active is None:
+            raise CustomException("No model has been loaded yet")
+        return self._active
+
+    @property
+    def loaded(self) -> bool:
+        return self._active is not None
+
+    def on_swap(self, callback: Callable[[LoadedModel], None]):
+        self._listeners.append(callback)
+
+    def _artifact_in(self, directory: Path) -> Optional[Path]:
+        compiled = directory / COMPILED_MODEL_OUTPUT_PATH.name
+        pickled = directory / MODEL_OUTPUT_PATH.name
+
+        if self.backend == "compiled":
+            candidates = [compiled]
+        elif self.backend == "lightgbm":
+            candidates = [pickled]
+        else:
+            candidates = [compiled, pickled]
+
+        return next((path for path in candidates if path.exists()), None)
+
+    def available_versions(self) -> List[str]:
+        if not self.versions_dir.is_dir():
+            return []
+        return sorted(
+            entry.name for entry in self.versions_dir.iterdir()
+            if entry.is_dir() and self._artifact_in(entry) is not None
+        )
+
+    def resolve(self, version: Optional[str] = None) -> Tuple[str, Path]:
+        """Map a requested version (default: pinned or newest) to its artifact path."""
+        version = version or self._pinned or SecretManager.MODEL_VERSION or None
+
+        if version is None:
+            versions = self.available_versions()
+            if versions:
+                version = versions[-1]
+
+        if version is not None and version != "legacy":
+            path = self._artifact_in(self.versions_dir / version)
+            if path is None:
+                raise CustomException(f"Model version '{version}' not found in {self.versions_dir}")
+            return version, path
+
+        path = self._artifact_in(self.model_dir)
+        if path is None:
+            raise CustomException(f"No model artifact found in {self.model_dir}")
+        return "legacy", path
+
+    def _read(self, path: Path):
+        if path.suffix == ".npz":
+            return CompiledForest.load(path)
+
+        import joblib
+        model = joblib.load(path)
+        # LightGBM predicts with the n_jobs it was trained with unless told otherwise
+        if hasattr(model, "set_params"):
+            model.set_params(n_jobs=self.threads)
+        return model
+
+    def _warm_up(self, loaded: LoadedModel):
+        rng = np.random.default_rng(0)
+        X = rng.uniform(0, 100, size=(self.warmup_rows, loaded.n_features)).astype(np.float32)
+
+        start = time.perf_counter()
+        probabilities = loaded.model.predict_proba(X)
+        loaded.model.predict_proba(X[:1])
+
+        if probabilities.shape != (self.warmup_rows, 2) or not np.isfinite(probabilities).all():
+            raise CustomException(f"Model version '{loaded.version}' produced invalid warm-up output")
+
+        logger.info(f"Warmed up model {loaded.version} in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    def prepare(self, version: Optional[str] = None) -> LoadedModel:
+        """Load and warm up a model version without serving it."""
+        version, path = self.resolve(version)
+        logger.info(f"Loading model version {version} from {path}")
+
+        transformer_path = path.parent / TRANSFORMER_OUTPUT_PATH.name
+        transformer = FeatureTransformer.load(transformer_path) if transformer_path.exists() else None
+        if transformer is None:
+            logger.warning(f"No {transformer_path.name} next to {path.name}, only pre-encoded inputs are accepted")
+
+        loaded = LoadedModel(version, self._read(path), path, transformer)
+        self._warm_up(loaded)
+        return loaded
+
+    def load(self, version: Optional[str] = None, pin: bool = False) -> LoadedModel:
+        """
+        Load, warm up and publish a model version. Blocks the caller. With
+        `pin`, the version becomes the default once it serves (None follows
+        the newest again); a version that fails to load is never pinned.
+        """
+        with self._reload_lock:
+            try:
+                loaded = self.prepare(version)
+                self._active = loaded
+                if pin:
+                    self._pinned = version
+                logger.info(f"Model version {loaded.version} is now serving")
+
+            except Exception as e:
+                logger.error(f"Error while loading model : {e}")
+                raise CustomException("Failed to load model", e)
+
+            # under the lock, so overlapping loads notify the cache and the
+            # shadow scorer in the order their models went live
+            for callback in self._listeners:
+                callback(loaded)
+        return loaded
+
+    def forward_reloads(self, forward: Callable[[Optional[str]], None]):
+        """Hand reload() requests to `forward` instead of loading in this process."""
+        self._forward_reload = forward
+
+    def reload(self, version: Optional[str] = None) -> Optional[threading.Thread]:
+        """
+        Load a version on a background thread; the current model keeps
+        serving meanwhile. An explicit version stays pinned for the watcher.
+        Forwarded requests return None, the process they went to loads it.
+        """
+        if self._forward_reload is not None:
+            self._forward_reload(version)
+            return None
+
+        def _target():
+            try:
+                self.load(version, pin=True)
+            except CustomException as ce:
+                current = self._active.version if self._active else None
+                logger.error(f"Model reload failed, keeping {current} :: {str(ce)}")
+
+        thread = threading.Thread(target=_target, name="model-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def is_stale(self) -> bool:
+        version, path = self.resolve()
+        active = self._active
+        return active is None or version != active.version or artifact_version(path) != active.fingerprint
+
+    def watch(self, interval_seconds: float):
+        """Poll MODEL_DIR and reload whenever a newer artifact shows up."""
+        if self._watcher is not None or interval_seconds <= 0:
+            return
+
+        def _poll():
+            while True:
+                time.sleep(interval_seconds)
+                try:
+                    if self.is_stale():
+                        logger.info("New model artifact detected")
+                        # loaded here rather than through reload(), which
+                        # may forward the request to another process
+                        self.load(self._pinned)
+                except Exception as e:
+                    logger.error(f"Error while watching model directory : {e}")
+
+        self._watcher = threading.Thread(target=_poll, name="model-watch", daemon=True)
+        self._watcher.start()
+        logger.info(f"Watching {self.model_dir} for new models every {interval_seconds}s")
@@ -0,0 +1,365 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, List, Optional, Tuple
+
+import numpy as np
+
+from .registry import LoadedModel, ModelRegistry
+from app.config.paths_config import SHADOW_REPORT_OUTPUT_PATH
+from app.config.secrets import SecretManager
+from app.utils.error import CustomException
+from app.utils.logger import AppLogger
+from app.utils.metrics import REGISTRY
+
+logger = AppLogger(__name__)()
+
+SHADOW_ROWS = REGISTRY.counter(
+    "shadow_rows",
+    "Rows scored by the shadow model, by whether its label agreed with the live model",
+    labelnames=("outcome",),
+)
+SHADOW_DROPPED = REGISTRY.counter("shadow_dropped_rows", "Sampled rows dropped because the shadow fell behind")
+SHADOW_PENDING = REGISTRY.gauge("shadow_pending_rows", "Sampled rows waiting for the shadow model")
+
+# upper bounds of the |candidate - live| positive-class probability buckets
+DELTA_BUCKETS = (0.01, 0.05, 0.1, 0.2, 0.5, 1.0)
+
+
+class ShadowStats:
+    """Agreement and probability deltas of the candidate against the live model."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.batches = 0
+        self.rows = 0
+        self.agree = 0
+        self.sum_delta = 0.0
+        self.sum_abs_delta = 0.0
+        self.max_abs_delta = 0.0
+        self.abs_delta_counts = [0] * len(DELTA_BUCKETS)
+        self.live_versions = set()
+
+    def add(self, live_version: str, agree: np.ndarray, delta: np.ndarray):
+        if not len(delta):
+            return
+        abs_delta = np.abs(delta)
+        self.batches += 1
+        self.rows += len(delta)
+        self.agree += int(agree.sum())
+        self.sum_delta += float(delta.sum())
+        self.sum_abs_delta += float(abs_delta.sum())
+        self.max_abs_delta = max(self.max_abs_delta, float(abs_delta.max()))
+        counts = np.bincount(np.searchsorted(DELTA_BUCKETS, abs_delta), minlength=len(DELTA_BUCKETS))
+        for i, count in enumerate(counts[:len(DELTA_BUCKETS)]):
+            self.abs_delta_counts[i] += int(count)
+        self.live_versions.add(live_version)
+
+    def report(self) -> dict:
+        rows = max(self.rows, 1)
+        return {
+            "window_start": self.started_at,
+            "window_seconds": round(time.time() - self.started_at, 3),
+            "live_versions": sorted(self.live_versions),
+            "batches": self.batches,
+            "rows": self.rows,
+            "agreement": self.agree / rows if self.rows else None,
+            "mean_delta": self.sum_delta / rows,
+            "mean_abs_delta": self.sum_abs_delta / rows,
+            "max_abs_delta": self.max_abs_delta,
+            "abs_delta_le": {str(bound): count for bound, count in zip(DELTA_BUCKETS, self.abs_delta_counts)},
+        }
+
+
+class FileSink:
+    """Appends one JSON line per flush."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def write(self, report: dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(report) + "\n")
+
+    def close(self):
+        pass
+
+
+class MlflowSink:
+    """
+    Logs every flush as a step of one MLflow run per serving process.
+    MLflow is a training dependency, imported only when this sink is used.
+    """
+
+    def __init__(self, candidate_version: str):
+        from mlflow.tracking import MlflowClient
+
+        self.client = MlflowClient()
+        self.run_id = self.client.create_run(
+            experiment_id="0",
+            run_name=f"shadow-{candidate_version}-{os.getpid()}",
+            tags={"training_mode": "shadow", "model_version": candidate_version},
+        ).info.run_id
+        self.step = 0
+
+    def write(self, report: dict):
+        from mlflow.entities import Metric
+
+        timestamp = int(time.time() * 1000)
+        values = {key: report[key] for key in ("rows", "agreement", "mean_delta", "mean_abs_delta",
+                                               "max_abs_delta", "dropped_rows")
+                  if report.get(key) is not None}
+        self.client.log_batch(self.run_id, metrics=[
+            Metric(f"shadow_{key}", float(value), timestamp, self.step) for key, value in values.items()
+        ])
+        self.client.set_tag(self.run_id, "live_model_version", ",".join(report["live_versions"]))
+        self.step += 1
+
+    def close(self):
+        self.client.set_terminated(self.run_id)
+
+
+class ShadowScorer:
+    """
+    Scores a sample of the live traffic with a candidate model, so it can
+    be compared with the live one before it is promoted.
+
+    `offer` runs on the request path and only draws the sample, each row
+    with probability `sample_rate` whatever the size of its batch, and
+    queues the rows already scored by the live model; a background
+    thread scores them with the candidate, aggregates agreement and
+    probability deltas and flushes them every `flush_interval` seconds.
+    Sampled rows beyond `max_pending_rows` are dropped, so a shadow that
+    falls behind costs bounded memory rather than latency.
+    """
+
+    def __init__(self, registry: ModelRegistry, version: str = SecretManager.SHADOW_MODEL_VERSION,
+                 sample_rate: float = SecretManager.SHADOW_SAMPLE_RATE,
+                 max_pending_rows: int = SecretManager.SHADOW_MAX_PENDING_ROWS,
+                 flush_interval: float = SecretManager.SHADOW_FLUSH_INTERVAL_SECONDS,
+                 sink: str = SecretManager.SHADOW_REPORT_SINK,
+                 report_path: str = SecretManager.SHADOW_REPORT_PATH or str(SHADOW_REPORT_OUTPUT_PATH)):
+        self.registry = registry
+        self.version = version
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.max_pending_rows = max_pending_rows
+        self.flush_interval = flush_interval
+        self.sink_name = sink
+        self.report_path = report_path
+
+        self.candidate: Optional[LoadedModel] = None
+        self.compatible = False
+        self._pending: Deque[Tuple[np.ndarray, np.ndarray, np.ndarray, str]] = deque()
+        self._pending_rows = 0
+        self._dropped_rows = 0
+        self._lock = threading.Lock()
+        self._rng = threading.local()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._window = ShadowStats()
+        self._total = ShadowStats()
+        registry.on_swap(self._check_compatible)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.version) and self.sample_rate > 0
+
+    def load(self):
+        """
+        Load the candidate next to the live model; a pre-forking parent does
+        this once so the workers share it.
+        """
+        if not self.enabled or self.candidate is not None:
+            return
+        try:
+            version = self.version
+            if version == "latest":
+                versions = self.registry.available_versions()
+                if not versions:
+                    raise CustomException(f"No model version in {self.registry.versions_dir} to shadow")
+                version = versions[-1]
+            self.candidate = self.registry.prepare(version)
+        except Exception as e:
+            logger.error(f"Error while loading the shadow model, shadow scoring is off : {e}")
+            return
+        self._check_compatible(self.registry.active)
+
+    @staticmethod
+    def _encoding(loaded: LoadedModel) -> dict:
+        # everything that decides what a served row holds: the category
+        # codes, which columns are log1p-transformed and the feature order
+        transformer = loaded.transformer
+        return {
+            "n_features": loaded.n_features,
+            "classes": transformer.classes if transformer is not None else None,
+            "log_columns": sorted(transformer.log_columns) if transformer is not None else None,
+            "selected_features": transformer.selected_features if transformer is not None else None,
+        }
+
+    def _check_compatible(self, live: LoadedModel):
+        # rows are encoded by the live transformer; a candidate that encodes
+        # them differently would be scored on inputs it was not trained on
+        candidate = self.candidate
+        if candidate is None:
+            return
+        live_encoding, candidate_encoding = self._encoding(live), self._encoding(candidate)
+        mismatched = [key for key in live_encoding if live_encoding[key] != candidate_encoding[key]]
+        self.compatible = not mismatched
+        if self.compatible:
+            logger.info(f"Shadow scoring {self.sample_rate:.0%} of the traffic of {live.version} "
+                        f"with candidate {candidate.version}")
+        else:
+            logger.warning(f"Candidate {candidate.version} does not encode features like live model "
+                           f"{live.version} ({', '.join(mismatched)} differ), shadow scoring paused")
+
+    def start(self):
+        """Start the scoring thread in the serving process."""
+        if self.candidate is None or self._thread is not None:
+            return
+        with self._lock:
+            self._window, self._total = ShadowStats(), ShadowStats()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+
+    def _sample(self, n_rows: int) -> Optional[np.ndarray]:
+        """Per-row mask drawn at sample_rate, or None when every row is taken."""
+        if self.sample_rate >= 1.0:
+            return None
+        # Generators are not thread-safe, each request thread draws from its own
+        rng = getattr(self._rng, "generator", None)
+        if rng is None:
+            rng = self._rng.generator = np.random.default_rng()
+        return rng.random(n_rows) < self.sample_rate
+
+    def offer(self, X: np.ndarray, labels: np.ndarray, positive: np.ndarray, live_version: str):
+        """Queue a sample of the rows the live model just scored. Never blocks on the candidate."""
+        if self._thread is None or not self.compatible:
+            return
+        mask = self._sample(len(X))
+        if mask is not None:
+            if not mask.any():
+                return
+            X, labels, positive = X[mask], labels[mask], positive[mask]
+        n_rows = len(X)
+        with self._lock:
+            if self._pending_rows + n_rows > self.max_pending_rows:
+                self._dropped_rows += n_rows
+                SHADOW_DROPPED.inc(n_rows)
+                return
+            self._pending.append((X, labels, positive, live_version))
+            self._pending_rows += n_rows
+            SHADOW_PENDING.set(self._pending_rows)
+        self._wake.set()
+
+    def _lower_priority(self):
+        # Linux nice values apply per thread: the kernel then prefers the
+        # threads serving requests whenever both are runnable
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (AttributeError, OSError):
+            pass
+
+    def _score(self, batch: List[Tuple[np.ndarray, np.ndarray, np.ndarray, str]]):
+        candidate = self.candidate
+        X = np.concatenate([X for X, _, _, _ in batch])
+        probabilities = candidate.model.predict_proba(X)
+        candidate_labels = candidate.model.classes_[probabilities.argmax(axis=1)]
+
+        start = 0
+        for X_live, labels, positive, live_version in batch:
+            end = start + len(X_live)
+            agree = candidate_labels[start:end] == labels
+            delta = probabilities[start:end, 1] - positive
+            with self._lock:
+                self._window.add(live_version, agree, delta)
+                self._total.add(live_version, agree, delta)
+            agreed = int(agree.sum())
+            SHADOW_ROWS.inc(agreed, outcome="agree")
+            SHADOW_ROWS.inc(len(agree) - agreed, outcome="disagree")
+            start = end
+
+    def _drain(self):
+        with self._lock:
+            batch = list(self._pending)
+            self._pending.clear()
+            self._pending_rows = 0
+            SHADOW_PENDING.set(0)
+        if batch:
+            try:
+                self._score(batch)
+            except Exception as e:
+                logger.error(f"Shadow scoring of {len(batch)} batches failed : {e}")
+
+    def _flush(self, sink):
+        with self._lock:
+            window, self._window = self._window, ShadowStats()
+            dropped, self._dropped_rows = self._dropped_rows, 0
+        if window.rows == 0 and dropped == 0:
+            return
+        report = dict(window.report(), candidate_version=self.candidate.version, process=os.getpid(),
+                      sample_rate=self.sample_rate, dropped_rows=dropped)
+        try:
+            sink.write(report)
+        except Exception as e:
+            logger.error(f"Error while flushing the shadow report : {e}")
+
+    def _sink(self):
+        if self.sink_name == "mlflow":
+            return MlflowSink(self.candidate.version)
+        return FileSink(self.report_path)
+
+    def _run(self):
+        self._lower_priority()
+        try:
+            sink = self._sink()
+        except Exception as e:
+            logger.error(f"Error while opening the shadow report sink {self.sink_name} : {e}")
+            self._thread = None
+            return
+
+        next_flush = time.monotonic() + self.flush_interval
+        while not self._stop.is_set():
+            self._wake.wait(max(0.0, next_flush - time.monotonic()))
+            self._wake.clear()
+            self._drain()
+            if time.monotonic() >= next_flush:
+                self._flush(sink)
+                next_flush = time.monotonic() + self.flush_interval
+
+        self._drain()
+        self._flush(sink)
+        try:
+            sink.close()
+        except Exception as e:
+            logger.error(f"Error while closing the shadow report sink : {e}")
+
+    def stop(self, timeout: float = 5.0):
+        """Score what is pending, flush the last window and stop the thread."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._total.report()
+            pending = self._pending_rows
+        return {
+            "enabled": self.enabled,
+            "running": self._thread is not None,
+            "compatible": self.compatible,
+            "candidate_version": self.candidate.version if self.candidate is not None else None,
+            "sample_rate": self.sample_rate,
+            "pending_rows": pending,
+            "dropped_rows": SHADOW_DROPPED.value(),
+            "since_start": total,
+        }
@@ -0,0 +1,201 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.utils.logger import AppLogger
+from app.utils.error import CustomException
+
+logger = AppLogger(__name__)()
+
+# per-worker copy of the class matrix and its index, set once by _init_worker
+_worker_state = {}
+
+
+def _init_worker(X: np.ndarray, index: Optional[dict]):
+    _worker_state["X"] = X
+    _worker_state["index"] = index
+
+
+def _squared_norms(X: np.ndarray) -> np.ndarray:
+    return np.einsum("ij,ij->i", X, X)
+
+
+def exact_neighbors(X: np.ndarray, rows: np.ndarray, k: int, block_cells: int = 32_000_000) -> np.ndarray:
+    """
+    k nearest neighbours (excluding the row itself) of X[rows] among all of
+    X, by brute force in blocks of query rows so the distance matrix stays
+    around block_cells entries.
+    """
+    block_rows = max(1, min(len(rows), block_cells // len(X)))
+    norms = _squared_norms(X)
+    neighbors = np.empty((len(rows), k), dtype=np.int64)
+
+    for start in range(0, len(rows), block_rows):
+        block = rows[start:start + block_rows]
+        distances = norms[block, None] + norms[None, :] - 2.0 * (X[block] @ X.T)
+        distances[np.arange(len(block)), block] = np.inf
+
+        nearest = np.argpartition(distances, k, axis=1)[:, :k]
+        order = np.take_along_axis(distances, nearest, axis=1).argsort(axis=1)
+        neighbors[start:start + len(block)] = np.take_along_axis(nearest, order, axis=1)
+    return neighbors
+
+
+def _nearest_centroids(X: np.ndarray, centroids: np.ndarray, n: int, block_rows: int = 65_536) -> np.ndarray:
+    centroid_norms = _squared_norms(centroids)
+    nearest = np.empty((len(X), n), dtype=np.int64)
+    for start in range(0, len(X), block_rows):
+        block = X[start:start + block_rows]
+        distances = centroid_norms[None, :] - 2.0 * (block @ centroids.T)
+        part = np.argpartition(distances, n - 1, axis=1)[:, :n] if n < len(centroids) else np.tile(np.arange(len(centroids)), (len(block), 1))
+        order = np.take_along_axis(distances, part, axis=1).argsort(axis=1)
+        nearest[start:start + len(block)] = np.take_along_axis(part, order, axis=1)
+    return nearest
+
+
+def build_ivf_index(X: np.ndarray, n_probe: int = 3, seed: int = 0, n_iter: int = 5) -> dict:
+    """
+    Inverted-file index over X: rows are partitioned around ~sqrt(len(X))
+    k-means centroids, and each partition lists the n_probe partitions
+    nearest to its centroid.
+    """
+    rng = np.random.default_rng(seed)
+    n_lists = max(1, int(np.sqrt(len(X))))
+    n_probe = min(n_probe, n_lists)
+
+    # a few Lloyd iterations on a sample are enough to balance the lists
+    sample = X[rng.choice(len(X), size=min(len(X), 64 * n_lists), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+    for _ in range(n_iter):
+        assignment = _nearest_centroids(sample, centroids, 1)[:, 0]
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        counts = np.bincount(assignment, minlength=n_lists)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+
+    list_of_row = _nearest_centroids(X, centroids, 1)[:, 0]
+    members = np.argsort(list_of_row, kind="stable")
+    bounds = np.searchsorted(list_of_row[members], np.arange(n_lists + 1))
+    probes = _nearest_centroids(centroids, centroids, n_probe)
+    return {"list_of_row": list_of_row, "members": members, "bounds": bounds, "probes": probes}
+
+
+def approximate_neighbors(X: np.ndarray, rows: np.ndarray, k: int, index: dict) -> np.ndarray:
+    """
+    Approximate k nearest neighbours through an index from build_ivf_index:
+    the query rows of each partition are compared only against the rows of
+    its probed partitions. Cost grows as len(X) ** 1.5 instead of
+    len(X) ** 2.
+    """
+    list_of_row, members, bounds, probes = index["list_of_row"], index["members"], index["bounds"], index["probes"]
+
+    neighbors = np.empty((len(rows), k), dtype=np.int64)
+    query_lists = list_of_row[rows]
+    for list_id in np.unique(query_lists):
+        at = np.flatnonzero(query_lists == list_id)
+        queries = rows[at]
+        candidates = np.concatenate([members[bounds[p]:bounds[p + 1]] for p in probes[list_id]])
+
+        distances = _squared_norms(X[candidates])[None, :] - 2.0 * (X[queries] @ X[candidates].T)
+        distances[candidates[None, :] == queries[:, None]] = np.inf
+
+        kk = min(k, len(candidates) - 1)
+        nearest = np.argpartition(distances, kk - 1, axis=1)[:, :kk] if kk < len(candidates) else np.tile(np.arange(len(candidates)), (len(queries), 1))
+        order = np.take_along_axis(distances, nearest, axis=1).argsort(axis=1)
+        found = candidates[np.take_along_axis(nearest, order, axis=1)]
+        # tiny partitions can hold fewer than k other rows; repeat the nearest
+        neighbors[at] = found[:, np.minimum(np.arange(k), found.shape[1] - 1)]
+    return neighbors
+
+
+def _neighbors_task(rows: np.ndarray, k: int) -> np.ndarray:
+    X, index = _worker_state["X"], _worker_state["index"]
+    if index is not None:
+        return approximate_neighbors(X, rows, k, index)
+    return exact_neighbors(X, rows, k)
+
+
+class ChunkedSMOTE:
+    """
+    SMOTE for large training sets, with the same sampling as imblearn's
+    default: every class is oversampled up to the majority class count by
+    interpolating between a random row and one of its k nearest same-class
+    neighbours.
+
+    All random draws happen up front from one seeded generator, so the
+    output only depends on random_state, not on n_jobs. Neighbours are
+    searched only for the rows that were drawn, in chunks spread over a
+    process pool, either exactly (blocked brute force) or approximately
+    (inverted-file index); the synthetic rows are then built in one
+    vectorized step.
+    """
+
+    def __init__(self, k_neighbors: int = 5, neighbors: str = "exact", n_probe: int = 3,
+                 chunk_rows: int = 16_384, n_jobs: int = -1, random_state: int = 42):
+        if neighbors not in ("exact", "approximate"):
+            raise ValueError(f"Unknown neighbour search '{neighbors}', expected 'exact' or 'approximate'")
+
+        self.k_neighbors = k_neighbors
+        self.neighbors = neighbors
+        self.n_probe = n_probe
+        self.chunk_rows = chunk_rows
+        self.n_jobs = (os.cpu_count() or 1) if n_jobs in (None, -1) else n_jobs
+        self.random_state = random_state
+
+    def _find_neighbors(self, X_class: np.ndarray, rows: np.ndarray, k: int) -> np.ndarray:
+        chunks = [rows[i:i + self.chunk_rows] for i in range(0, len(rows), self.chunk_rows)]
+        index = None
+        if self.neighbors == "approximate":
+            index = build_ivf_index(X_class, n_probe=self.n_probe, seed=self.random_state)
+
+        if self.n_jobs == 1 or len(chunks) == 1:
+            _init_worker(X_class, index)
+            return np.concatenate([_neighbors_task(chunk, k) for chunk in chunks])
+
+        with ProcessPoolExecutor(max_workers=min(self.n_jobs, len(chunks)), initializer=_init_worker,
+                                 initargs=(X_class, index)) as pool:
+            futures = [pool.submit(_neighbors_task, chunk, k) for chunk in chunks]
+            return np.concatenate([future.result() for future in futures])
+
+    def _sample_class(self, X_class: np.ndarray, n_new: int, rng: np.random.Generator) -> np.ndarray:
+        k = min(self.k_neighbors, len(X_class) - 1)
+        if k < 1:
+            raise ValueError("SMOTE needs at least two rows of every minority class")
+
+        base = rng.integers(0, len(X_class), size=n_new)
+        pick = rng.integers(0, k, size=n_new)
+        steps = rng.random(size=n_new, dtype=np.float32)[:, None]
+
+        drawn, inverse = np.unique(base, return_inverse=True)
+        neighbors = self._find_neighbors(X_class, drawn, k)[inverse, pick]
+
+        return X_class[base] + steps * (X_class[neighbors] - X_class[base])
+
+    def fit_resample(self, X: pd.DataFrame, y: pd.Series) -> Tuple[pd.DataFrame, pd.Series]:
+        try:
+            values = X.to_numpy(dtype=np.float32)
+            labels = y.to_numpy()
+            classes, counts = np.unique(labels, return_counts=True)
+            target = counts.max()
+
+            rng = np.random.default_rng(self.random_state)
+            synthetic_X, synthetic_y = [values], [labels]
+            for label, count in zip(classes, counts):
+                if count == target:
+                    continue
+                logger.info(f"Generating {target - count} synthetic rows for class {label}")
+                synthetic_X.append(self._sample_class(values[labels == label], target - count, rng))
+                synthetic_y.append(np.full(target - count, label, dtype=labels.dtype))
+
+            X_resampled = pd.DataFrame(np.concatenate(synthetic_X), columns=X.columns, copy=False)
+            # the same dtypes in as out, like imblearn does for DataFrames
+            X_resampled = X_resampled.astype(X.dtypes.to_dict(), copy=False)
+            return X_resampled, pd.Series(np.concatenate(synthetic_y), name=y.name)
+
+        except Exception as e:
+            logger.error(f"Error during chunked SMOTE : {e}")
+            raise CustomException("Failed to oversample data", e)
@@ -0,0 +1,210 @@
+import numpy as np
+
+from app.utils.logger import AppLogger
+from app.utils.error import CustomException
+
+logger = AppLogger(__name__)()
+
+# LightGBM missing_type encoding
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+_MISSING_TYPES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+_ZERO_THRESHOLD = 1e-35
+
+
+class CompiledForest:
+    """
+    Pure NumPy re-implementation of a binary LightGBM booster.
+
+    All trees are flattened into shared node arrays (feature index,
+    threshold, left/right child, leaf value). Every (row, tree) pair walks
+    down one level per vectorized step, and pairs that reached a leaf are
+    dropped from the working set, so there is no per-row Python code.
+    """
+
+    CHUNK_SIZE = 4096
+
+    def __init__(self, feature, threshold, left, right, value, default_left, missing_type,
+                 roots, max_depth, classes, feature_names, sigmoid=1.0, average_output=False):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.default_left = default_left
+        self.missing_type = missing_type
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.feature_names = feature_names
+        self.sigmoid = float(sigmoid)
+        self.average_output = bool(average_output)
+
+        self._is_leaf = self.left == np.arange(len(self.left))
+        self._split_threshold = np.where(self._is_leaf, np.inf, self.threshold)
+        self._has_missing = bool((self.missing_type[~self._is_leaf] != MISSING_NONE).any())
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_classifier(cls, model) -> "CompiledForest":
+        return cls.from_booster(model.booster_, model.classes_)
+
+    @classmethod
+    def from_booster(cls, booster, classes) -> "CompiledForest":
+        dump = booster.dump_model()
+
+        objective = dump.get("objective", "")
+        if dump.get("num_class", 1) != 1 or not objective.startswith("binary"):
+            raise CustomException(f"Only binary boosters can be compiled, got objective '{objective}'")
+
+        sigmoid = 1.0
+        for token in objective.split():
+            if token.startswith("sigmoid:"):
+                sigmoid = float(token.split(":", 1)[1])
+
+        feature, threshold, left, right, value, default_left, missing_type = [], [], [], [], [], [], []
+        roots, max_depth = [], 0
+
+        for tree in dump["tree_info"]:
+            roots.append(len(feature))
+            # (node json, index reserved for it, depth)
+            stack = [(tree["tree_structure"], len(feature), 0)]
+            for arr in (feature, threshold, left, right, value, default_left, missing_type):
+                arr.append(0)
+
+            # children are appended as adjacent (left, right) pairs
+            while stack:
+                node, idx, depth = stack.pop()
+                max_depth = max(max_depth, depth)
+
+                if "leaf_value" in node:
+                    left[idx] = right[idx] = idx
+                    value[idx] = node["leaf_value"]
+                    continue
+
+                if node["decision_type"] != "<=":
+                    raise CustomException(f"Unsupported split type '{node['decision_type']}'")
+
+                feature[idx] = node["split_feature"]
+                threshold[idx] = node["threshold"]
+                default_left[idx] = node["default_left"]
+                missing_type[idx] = _MISSING_TYPES[node["missing_type"]]
+
+                for side, child in (("left", node["left_child"]), ("right", node["right_child"])):
+                    child_idx = len(feature)
+                    for arr in (feature, threshold, left, right, value, default_left, missing_type):
+                        arr.append(0)
+                    (left if side == "left" else right)[idx] = child_idx
+                    stack.append((child, child_idx, depth + 1))
+
+        logger.info(f"Compiled {len(roots)} trees into {len(feature)} nodes (max depth {max_depth})")
+
+        return cls(
+            feature=np.asarray(feature, dtype=np.int32),
+            threshold=np.asarray(threshold, dtype=np.float64),
+            left=np.asarray(left, dtype=np.int32),
+            right=np.asarray(right, dtype=np.int32),
+            value=np.asarray(value, dtype=np.float64),
+            default_left=np.asarray(default_left, dtype=bool),
+            missing_type=np.asarray(missing_type, dtype=np.int8),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            classes=np.asarray(classes),
+            feature_names=np.asarray(dump.get("feature_names", []), dtype=str),
+            sigmoid=sigmoid,
+            average_output=dump.get("average_output", False),
+        )
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            feature=self.feature,
+            threshold=self.threshold,
+            left=self.left,
+            right=self.right,
+            value=self.value,
+            default_left=self.default_left,
+            missing_type=self.missing_type,
+            roots=self.roots,
+            max_depth=np.asarray(self.max_depth),
+            classes=self.classes_,
+            feature_names=self.feature_names,
+            sigmoid=np.asarray(self.sigmoid),
+            average_output=np.asarray(self.average_output),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledForest":
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(**{key: arrays[key] for key in arrays.files})
+
+    def _raw_score(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_trees = X.shape[0], self.n_trees
+        if not self._has_missing:
+            # every split treats missing as zero, so resolve NaN once up front
+            X = np.where(np.isnan(X), 0.0, X)
+
+        flat = X.ravel()
+        # one (row, tree) pair per slot, dropped from the active set once it hits a leaf
+        row_offset = np.repeat(np.arange(n_rows, dtype=np.intp) * X.shape[1], n_trees)
+        nodes = np.tile(self.roots.astype(np.intp), n_rows)
+        pair = np.arange(n_rows * n_trees)
+        leaves = np.empty(n_rows * n_trees, dtype=np.intp)
+
+        for depth in range(self.max_depth):
+            x = flat[row_offset + self.feature[nodes]]
+
+            if self._has_missing:
+                missing_type = self.missing_type[nodes]
+                is_nan = np.isnan(x)
+                x = np.where(is_nan & (missing_type != MISSING_NAN), 0.0, x)
+                use_default = ((missing_type == MISSING_ZERO) & (np.abs(x) <= _ZERO_THRESHOLD)) | \
+                              ((missing_type == MISSING_NAN) & is_nan)
+                go_right = np.where(use_default, ~self.default_left[nodes], x > self._split_threshold[nodes])
+            else:
+                go_right = x > self._split_threshold[nodes]
+
+            # right children are stored next to their left sibling; leaves loop back to themselves
+            nodes = self.left[nodes] + go_right
+
+            if depth % 2 == 1:
+                done = self._is_leaf[nodes]
+                leaves[pair[done]] = nodes[done]
+                active = ~done
+                nodes, row_offset, pair = nodes[active], row_offset[active], pair[active]
+                if not len(nodes):
+                    break
+
+        leaves[pair] = nodes
+        raw = self.value[leaves].reshape(n_rows, n_trees).sum(axis=1)
+        if self.average_output:
+            raw /= n_trees
+        return raw
+
+    def raw_score(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return np.concatenate([
+            self._raw_score(X[start:start + self.CHUNK_SIZE])
+            for start in range(0, X.shape[0], self.CHUNK_SIZE)
+        ]) if X.shape[0] else np.empty(0)
+
+    def predict_proba(self, X) -> np.ndarray:
+        positive = 1.0 / (1.0 + np.exp(-self.sigmoid * self.raw_score(X)))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+if __name__ == "__main__":
+    import joblib
+    from app.config.paths_config import MODEL_OUTPUT_PATH, COMPILED_MODEL_OUTPUT_PATH
+
+    compiled = CompiledForest.from_classifier(joblib.load(MODEL_OUTPUT_PATH))
+    compiled.save(COMPILED_MODEL_OUTPUT_PATH)
+
+    logger.info(f"Compiled model saved to {COMPILED_MODEL_OUTPUT_PATH}")
@@ -1,4 +1,6 @@
 import os
+from typing import Optional
+
 import pandas as pd
 from google.cloud import storage
 from sklearn.model_selection import train_test_split
@@ -6,18 +8,27 @@ from app.utils.logger import AppLogger
 from app.utils.error import CustomException
 from app.config.secrets import SecretManager
 from app.config.paths_config import *
-from app.utils.file_handler import read_yaml
+from app.utils.file_handler import read_yaml, load_data, save_data, schema_dtypes, ChunkWriter
+from app.srv.object_storage import StorageBackend, GCSBackend, RangedDownloader
 
 
 logger = AppLogger(__name__)()
 
 class DataIngestion:
 
-    def __init__(self, config):
+    def __init__(self, config, backend: Optional[StorageBackend] = None):
         self.config = config["data_ingestion"]
         self.bucket_name = self.config["bucket_name"]
         self.file_name = self.config["bucket_file_name"]
         self.train_test_ratio = self.config["train_ratio"]
+        self.dtypes = schema_dtypes(config["data_processing"])
+
+        self.streaming = self.config.get("streaming", False)
+        self.chunk_size_mb = self.config.get("chunk_size_mb", 8)
+        self.download_workers = self.config.get("download_workers", 8)
+        self.split_key = self.config.get("split_key")
+        self.split_chunk_rows = self.config.get("split_chunk_rows", 100_000)
+        self._backend = backend
 
         os.makedirs(RAW_DIR, exist_ok=True)
 
@@ -38,16 +49,67 @@ class DataIngestion:
             logger.error("Error while downloading the csv file")
             raise CustomException("Failed to download csv file", e)
         
+    @property
+    def backend(self) -> StorageBackend:
+        if self._backend is None:
+            self._backend = GCSBackend(self.bucket_name)
+        return self._backend
+
+    def download_ranged(self, target: str = RAW_FILE_PATH):
+        chunk_size = int(self.chunk_size_mb * 1024 * 1024)
+        RangedDownloader(self.backend, chunk_size, self.download_workers).download(self.file_name, target)
+
+    def split_streaming(self, source: str = RAW_FILE_PATH, train_path: str = TRAIN_FILE_PATH,
+                        test_path: str = TEST_FILE_PATH):
+        """
+        Split the raw CSV chunk by chunk: a row goes to train when the hash
+        of its split_key (the whole row when unset) falls below
+        train_ratio. The assignment depends only on the row itself, so it
+        is stable across runs and chunk sizes and never needs the full
+        dataset in memory.
+        """
+        try:
+            logger.info(f"Streaming split of {source} in chunks of {self.split_chunk_rows} rows")
+
+            numeric = {col: dtype for col, dtype in self.dtypes.items() if dtype != "category"}
+            threshold = int(self.train_test_ratio * 10_000)
+            train_writer, test_writer = ChunkWriter(train_path), ChunkWriter(test_path)
+
+            for chunk in pd.read_csv(source, chunksize=self.split_chunk_rows, dtype=numeric):
+                keys = chunk[self.split_key] if self.split_key else chunk
+                is_train = (pd.util.hash_pandas_object(keys, index=False).to_numpy() % 10_000) < threshold
+
+                train_writer.write(chunk[is_train])
+                test_writer.write(chunk[~is_train])
+
+            train_writer.close()
+            test_writer.close()
+
+            logger.info(f"Train Data saved to {train_path} ({train_writer.rows} rows)")
+            logger.info(f"Test Data saved to {test_path} ({test_writer.rows} rows)")
+
+        except Exception as e:
+            logger.error("Error while splitting data")
+            raise CustomException("Failed to split data into training and test sets", e)
+
+    def source_fingerprint(self):
+        """Generation and MD5 of the bucket object, read from its metadata without downloading it."""
+        try:
+            return f"{self.backend.generation(self.file_name)}:{self.backend.md5(self.file_name)}"
+        except Exception as e:
+            logger.warning(f"Could not read metadata of {self.file_name} : {e}")
+            return None
+
     def split_data(self):
         try:
             logger.info("Starting the splitting process")
 
-            data = pd.read_csv(RAW_FILE_PATH)
+            data = load_data(RAW_FILE_PATH, dtypes=self.dtypes)
 
             train_data, test_data = train_test_split(data, train_size=self.train_test_ratio, random_state=42)
 
-            train_data.to_csv(TRAIN_FILE_PATH)
-            test_data.to_csv(TEST_FILE_PATH)
+            save_data(train_data, TRAIN_FILE_PATH)
+            save_data(test_data, TEST_FILE_PATH)
 
             logger.info(f"Train Data saved to {TRAIN_FILE_PATH}")
             logger.info(f"Test Data saved to {TEST_FILE_PATH}")
@@ -61,13 +123,19 @@ class DataIngestion:
         try:
             logger.info("Starting data ingestion process")
 
-            self.download_csv_from_gcp()
-            self.split_data()
+            if self.streaming:
+                self.download_ranged()
+                self.split_streaming()
+            else:
+                self.download_csv_from_gcp()
+                self.split_data()
 
             logger.info("Data ingestion completed successfully")
 
         except CustomException as ce:
             logger.error(f"CustomException :: {str(ce)}")
+            # the stage cache must not record a failed run as done
+            raise
 
         finally:
             logger.info("Data ingestion completed")
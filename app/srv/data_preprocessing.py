@@ -5,10 +5,13 @@ import numpy as np
 from app.utils.logger import AppLogger
 from app.utils.error import CustomException
 from app.config.paths_config import *
-from app.utils.file_handler import read_yaml, load_data
+from app.utils.file_handler import read_yaml, load_data, save_data, schema_dtypes
+from app.utils.memory import peak_rss_mb, reset_peak_rss
+
+from app.srv.feature_transformer import FeatureTransformer
+from app.srv.balancing import ChunkedSMOTE
+from app.srv.feature_ranking import FeatureRanker
 
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
 from imblearn.over_sampling import SMOTE
 
 logger = AppLogger(__name__)()
@@ -22,43 +25,28 @@ class DataProcessor:
         self.processed_dir = processed_dir
         
         self.config = read_yaml(config_path)
+        self.transformer = FeatureTransformer.from_config(self.config)
+        self.balancing = self.config["data_processing"].get("balancing", {})
 
         if not os.path.exists(self.processed_dir):
             os.makedirs(self.processed_dir, exist_ok=True)
 
 
     
-    def preprocess_data(self, df: pd.DataFrame):
+    def preprocess_data(self, df: pd.DataFrame, fit: bool = False):
         try:
             logger.info("Starting Data Processing")
 
             logger.info("Dropping irrelevaqnt columns")
-            df.drop(columns=['Unnamed: 0', 'Booking_ID'] , inplace=True)
+            df.drop(columns=['Unnamed: 0', 'Booking_ID'] , inplace=True, errors="ignore")
             df.drop_duplicates(inplace=True)
 
-            categorical_columns = self.config["data_processing"]["categorical_columns"]
-            numerical_columns = self.config["data_processing"]["numerical_columns"]
-
-            logger.info("Applying Label Encoding")
-
-            encoder = LabelEncoder()
-            mappings = {}
-
-            for col in categorical_columns:
-                df[col] = encoder.fit_transform(df[col])
-
-                mappings[col] = {label:code for label,code in zip(encoder.classes_ , encoder.transform(encoder.classes_))}
-
-            logger.info("Label Mappings are : ")
-            for col, mapping in mappings.items():
-                logger.info(f"{col} : {mapping}")
+            if fit:
+                logger.info("Fitting Label Encoding and skewness handling on training data")
+                self.transformer.fit(df)
 
-            logger.info("Doing skewness handling")
-            skew_threshold = self.config["data_processing"]["skewness_threshold"]
-            skewness = df[numerical_columns].apply(lambda x: x.skew())
-
-            for column in skewness[skewness > skew_threshold].index:
-                df[column] = np.log1p(df[column])
+            logger.info("Applying Label Encoding and skewness handling")
+            df = self.transformer.transform(df)
 
             return df       
 
@@ -69,14 +57,27 @@ class DataProcessor:
 
     def balance_data(self, df: pd.DataFrame):
         try:
-            logger.info("Handling Imbalanced data")
-            X = df.drop(columns='booking_status')
-            y = df["booking_status"]
-
-            smote = SMOTE(random_state=42)
-            X_resampled, y_resampled = smote.fit_resample(X, y)
-
-            balanced_df = pd.DataFrame(X_resampled, columns = X.columns)
+            method = self.balancing.get("method", "smote")
+            if method == "class_weight":
+                logger.info("Class weights requested, leaving the data unbalanced")
+                return df
+
+            logger.info(f"Handling Imbalanced data with {method}")
+            # pop instead of drop: the target leaves df without copying the
+            # features; SMOTE hands back a frame in the same compact dtypes
+            y = df.pop("booking_status")
+
+            if method == "chunked_smote":
+                smote = ChunkedSMOTE(
+                    k_neighbors=self.balancing.get("k_neighbors", 5),
+                    neighbors=self.balancing.get("neighbors", "exact"),
+                    chunk_rows=self.balancing.get("chunk_rows", 16_384),
+                    n_jobs=self.balancing.get("n_jobs", -1),
+                    random_state=42,
+                )
+            else:
+                smote = SMOTE(random_state=42)
+            balanced_df, y_resampled = smote.fit_resample(df, y)
             balanced_df["booking_status"] = y_resampled
 
             logger.info("Data balanced successfully")
@@ -91,24 +92,16 @@ class DataProcessor:
             X = df.drop(columns = "booking_status")
             y = df["booking_status"]
 
-            model = RandomForestClassifier(random_state=42)
-            model.fit(X, y)
-
-            feature_importance = model.feature_importances_
-            feature_importance_df = pd. DataFrame({
-                         'feature': X.columns,
-                'importance': feature_importance
-            })
+            # without oversampling the ranking model weighs the classes instead
+            class_weight = "balanced" if self.balancing.get("method") == "class_weight" else None
+            ranker = FeatureRanker.from_config(self.config["data_processing"], class_weight=class_weight)
 
             number_of_features_to_select = self.config["data_processing"]["no_features_select"]
+            top_features = ranker.select(X, y, number_of_features_to_select)
 
-            top_features_importance_df = feature_importance_df.sort_values(by="importance" , ascending=False)
-
-            top_features = top_features_importance_df["feature"].head(number_of_features_to_select).values
+            logger.info(f"Top Features Selected : {top_features}")
 
-            logger.info(f"Top Features Selected : {top_features.tolist() }")
-
-            top_df = df[top_features.tolist() + ["booking_status"]]
+            top_df = df[top_features + ["booking_status"]]
 
             logger.info("Feature Selection Completed")
 
@@ -122,31 +115,70 @@ class DataProcessor:
     def export_data(self, df: pd.DataFrame, file_path: str):
         try:
             logger.info("Saving data to processed folder")
-            df.to_csv(file_path, index=False)
+            save_data(df, file_path)
         except Exception as e:
             logger.error(f"Error during data export : {e}")
             raise CustomException("Failed to export data", e)
         
 
 
+    def process_partition(self, path: str, transformer: FeatureTransformer) -> pd.DataFrame:
+        """
+        Load a newly ingested raw partition and encode it with an already
+        fitted transform, keeping only the features the model was trained on.
+        """
+        try:
+            logger.info(f"Processing new partition {path} with the persisted encodings")
+            dtypes = schema_dtypes(self.config["data_processing"])
+            df = load_data(path, columns=list(dtypes), dtypes=dtypes)
+
+            self.transformer = transformer
+            df = self.preprocess_data(df)
+            return df[transformer.selected_features + ["booking_status"]]
+
+        except Exception as e:
+            logger.error(f"Error while processing partition {path} : {e}")
+            raise CustomException("Failed to process data partition", e)
+
+
+    @staticmethod
+    def _peak_rss(reset: bool) -> str:
+        # without a reset the value is the high-water mark of the whole process
+        return f"peak RSS {peak_rss_mb():.0f} MB" + ("" if reset else " (process-wide, reset not supported)")
+
+
     def process(self):
         try:
             logger.info("Loading data fro RAW dir")
 
-            train_df = load_data(self.train_path)
-            test_df = load_data(self.test_path)
+            reset = reset_peak_rss()
+            # only the configured columns are read, Booking_ID never leaves disk
+            dtypes = schema_dtypes(self.config["data_processing"])
+            train_df = load_data(self.train_path, columns=list(dtypes), dtypes=dtypes)
+            test_df = load_data(self.test_path, columns=list(dtypes), dtypes=dtypes)
+            logger.info(f"Loaded {len(train_df)} training rows, {train_df.memory_usage(deep=True).sum() / 1e6:.1f} MB, {self._peak_rss(reset)}")
 
-            train_df = self.preprocess_data(train_df)
+            reset = reset_peak_rss()
+            train_df = self.preprocess_data(train_df, fit=True)
             test_df = self.preprocess_data(test_df)
 
+            logger.info(f"Preprocessing {self._peak_rss(reset)}")
+
+            reset = reset_peak_rss()
             train_df = self.balance_data(train_df)
+            logger.info(f"Balancing {self._peak_rss(reset)}")
 
+            reset = reset_peak_rss()
             train_df = self.select_features(train_df)
             test_df = test_df[train_df.columns]
+            logger.info(f"Feature selection {self._peak_rss(reset)}")
 
             self.export_data(train_df, PROCESSED_TRAIN_DATA_PATH)
             self.export_data(test_df, PROCESSED_TEST_DATA_PATH)
 
+            self.transformer.selected_features = [col for col in train_df.columns if col != "booking_status"]
+            self.transformer.save(PROCESSED_TRANSFORMER_PATH)
+
             logger.info("Data Processing completed")
 
         except Exception as e:
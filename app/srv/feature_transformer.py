@@ -0,0 +1,153 @@
+import json
+from itertools import repeat
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from app.utils.logger import AppLogger
+from app.utils.error import CustomException
+
+logger = AppLogger(__name__)()
+
+
+class FeatureTransformer:
+    """
+    Fit-once preprocessing: label encoding for categorical columns and
+    log1p for numerical columns whose skewness exceeds the threshold.
+
+    Fitted on the training split only and saved as JSON next to the model,
+    so the test split, bulk scoring and the API all reuse the exact same
+    encodings without refitting. fit and transform work on DataFrames; the
+    serve-time methods only need numpy, so the API never imports pandas.
+    """
+
+    def __init__(self, categorical_columns: Sequence[str], numerical_columns: Sequence[str],
+                 skewness_threshold: float):
+        self.categorical_columns = list(categorical_columns)
+        self.numerical_columns = list(numerical_columns)
+        self.skewness_threshold = skewness_threshold
+
+        self.classes: Dict[str, list] = {}
+        self.log_columns: List[str] = []
+        self.selected_features: Optional[List[str]] = None
+        self._lookups: Dict[str, dict] = {}
+
+    @classmethod
+    def from_config(cls, config: dict) -> "FeatureTransformer":
+        processing = config["data_processing"]
+        return cls(processing["categorical_columns"], processing["numerical_columns"],
+                   processing["skewness_threshold"])
+
+    def _build_lookups(self):
+        self._lookups = {
+            col: {label: code for code, label in enumerate(labels)}
+            for col, labels in self.classes.items()
+        }
+
+    def fit(self, df: "pd.DataFrame") -> "FeatureTransformer":
+        # same codes LabelEncoder assigns: position in the sorted unique labels
+        self.classes = {col: np.unique(df[col]).tolist() for col in self.categorical_columns}
+        self._build_lookups()
+
+        skewness = df[self.numerical_columns].apply(lambda x: x.skew())
+        self.log_columns = skewness[skewness > self.skewness_threshold].index.tolist()
+
+        for col, labels in self.classes.items():
+            logger.info(f"{col} : {self._lookups[col]}")
+        logger.info(f"log1p columns : {self.log_columns}")
+        return self
+
+    def transform(self, df: "pd.DataFrame") -> "pd.DataFrame":
+        """Encode the columns of df in place; unseen labels become -1."""
+        import pandas as pd
+
+        for col, labels in self.classes.items():
+            if col not in df.columns:
+                continue
+            codes = pd.Categorical(df[col], categories=labels).codes
+            unknown = int((codes == -1).sum())
+            if unknown:
+                logger.warning(f"{unknown} rows of {col} have labels unseen during fit, encoded as -1")
+            df[col] = codes
+
+        for col in self.log_columns:
+            if col in df.columns:
+                # int8 columns would otherwise come back as float16
+                df[col] = np.log1p(df[col].to_numpy(dtype=np.float32))
+        return df
+
+    def encode_column(self, col: str, values) -> np.ndarray:
+        """
+        Serve-time lookup for one categorical column: string labels are
+        mapped to their codes, numbers are taken as already-encoded codes.
+        """
+        if not (len(values) and isinstance(values[0], str)):
+            try:
+                # already-encoded codes: numeric arrays and lists of numbers
+                return np.asarray(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                pass
+
+        # the lookup runs in C through map, unmatched values come out as NaN
+        lookup = self._lookups.get(col, {})
+        codes = np.fromiter(map(lookup.get, values, repeat(np.nan)), dtype=np.float64, count=len(values))
+
+        unknown = set()
+        for i in np.flatnonzero(np.isnan(codes)):
+            # numbers mixed in with labels, or labels unseen during fit
+            value = values[i]
+            if isinstance(value, str):
+                unknown.add(value)
+            else:
+                codes[i] = value
+
+        if unknown:
+            raise ValueError(f"Unknown {col} label(s) {sorted(unknown)}, expected one of {self.classes.get(col)}")
+        return codes
+
+    def apply_log(self, X: np.ndarray, feature_names: Sequence[str]) -> np.ndarray:
+        """Apply the fitted log1p to the matching columns of a feature matrix, in place."""
+        for j, col in enumerate(feature_names):
+            if col in self.log_columns:
+                X[:, j] = np.log1p(X[:, j])
+        return X
+
+    def to_dict(self) -> dict:
+        return {
+            "categorical_columns": self.categorical_columns,
+            "numerical_columns": self.numerical_columns,
+            "skewness_threshold": self.skewness_threshold,
+            "classes": self.classes,
+            "log_columns": self.log_columns,
+            "selected_features": self.selected_features,
+        }
+
+    def save(self, path: str):
+        try:
+            with open(path, "w") as f:
+                json.dump(self.to_dict(), f, indent=4)
+            logger.info(f"Preprocessing transform saved to {path}")
+        except Exception as e:
+            logger.error(f"Error while saving preprocessing transform : {e}")
+            raise CustomException("Failed to save preprocessing transform", e)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FeatureTransformer":
+        transformer = cls(data["categorical_columns"], data["numerical_columns"], data["skewness_threshold"])
+        transformer.classes = data["classes"]
+        transformer.log_columns = data["log_columns"]
+        transformer.selected_features = data.get("selected_features")
+        transformer._build_lookups()
+        return transformer
+
+    @classmethod
+    def load(cls, path: str) -> "FeatureTransformer":
+        try:
+            with open(path) as f:
+                return cls.from_dict(json.load(f))
+        except Exception as e:
+            logger.error(f"Error while loading preprocessing transform : {e}")
+            raise CustomException("Failed to load preprocessing transform", e)
@@ -0,0 +1,183 @@
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import lightgbm as lgb
+import numpy as np
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterSampler, train_test_split
+
+from app.utils.logger import AppLogger
+from app.utils.error import CustomException
+
+logger = AppLogger(__name__)()
+
+
+class Trial:
+    """One sampled configuration and its score at the largest budget it reached."""
+
+    def __init__(self, trial_id: int, params: dict):
+        self.trial_id = trial_id
+        self.params = params
+        self.score = -np.inf
+        self.budget = 0
+        self.best_iteration = 0
+
+
+class HalvingSearch:
+    """
+    Successive halving / Hyperband over LightGBM hyperparameters.
+
+    The budget is the number of boosting rounds. Every rung fits its
+    surviving configurations concurrently with early stopping on a held-out
+    validation split, keeps the best 1/eta, and gives the survivors eta
+    times more rounds. Hyperband repeats this over brackets that trade the
+    number of configurations against the starting budget.
+
+    Each trial gets `threads_per_trial` LightGBM threads and at most
+    n_cpus // threads_per_trial trials run at once, so the search never
+    oversubscribes the machine.
+    """
+
+    def __init__(self, param_distributions: dict, mode: str = "hyperband", n_trials: int = 27,
+                 min_resource: int = 20, max_resource: int = 500, eta: int = 3,
+                 validation_size: float = 0.2, early_stopping_rounds: int = 20,
+                 n_jobs: int = -1, threads_per_trial: int = 1, time_budget_seconds: Optional[float] = None,
+                 random_state: int = 42, scoring: str = "accuracy", class_weight=None):
+        if mode not in ("halving", "hyperband"):
+            raise ValueError(f"Unknown search mode '{mode}', expected 'halving' or 'hyperband'")
+
+        # early stopping decides the number of rounds, so it is not sampled
+        self.param_distributions = {k: v for k, v in param_distributions.items() if k != "n_estimators"}
+        self.mode = mode
+        self.n_trials = n_trials
+        self.min_resource = min_resource
+        self.max_resource = max_resource
+        self.eta = eta
+        self.validation_size = validation_size
+        self.early_stopping_rounds = early_stopping_rounds
+        self.threads_per_trial = max(1, threads_per_trial)
+        self.time_budget_seconds = time_budget_seconds
+        self.random_state = random_state
+        self.class_weight = class_weight
+        self.scorer = get_scorer(scoring)
+
+        n_cpus = os.cpu_count() or 1
+        self.max_concurrent = max(1, (n_cpus if n_jobs in (None, -1) else n_jobs) // self.threads_per_trial)
+
+        self.trials: List[Trial] = []
+        self.best_: Optional[Trial] = None
+        self.best_estimator_ = None
+        self.n_fits_ = 0
+        self.time_to_best_ = 0.0
+        self.elapsed_ = 0.0
+        self._start = 0.0
+        self._next_id = 0
+
+    @property
+    def best_params_(self) -> dict:
+        return {**self.best_.params, "n_estimators": self.best_.best_iteration}
+
+    def brackets(self) -> List[tuple]:
+        """(n_configs, starting_rounds) for every bracket this search runs."""
+        s_max = int(math.floor(math.log(self.max_resource / self.min_resource, self.eta) + 1e-9))
+        if self.mode == "halving":
+            return [(self.n_trials, self.min_resource)]
+
+        brackets = []
+        for s in range(s_max, -1, -1):
+            n = int(math.ceil((s_max + 1) / (s + 1) * self.eta ** s))
+            brackets.append((min(n, self.n_trials), int(round(self.max_resource * self.eta ** -s))))
+        return brackets
+
+    def _out_of_time(self) -> bool:
+        return self.time_budget_seconds is not None and time.perf_counter() - self._start > self.time_budget_seconds
+
+    def _sample(self, n: int, seed: int) -> List[Trial]:
+        trials = []
+        for params in ParameterSampler(self.param_distributions, n, random_state=seed):
+            trials.append(Trial(self._next_id, params))
+            self._next_id += 1
+        self.trials.extend(trials)
+        return trials
+
+    def _fit_trial(self, trial: Trial, rounds: int, data: tuple):
+        X_fit, y_fit, X_val, y_val = data
+        model = lgb.LGBMClassifier(
+            **trial.params, n_estimators=rounds, n_jobs=self.threads_per_trial,
+            class_weight=self.class_weight, random_state=self.random_state, verbose=-1,
+        )
+
+        # dart does not support early stopping, it always runs every round
+        callbacks = [] if trial.params.get("boosting_type") == "dart" else [
+            lgb.early_stopping(self.early_stopping_rounds, verbose=False)
+        ]
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], callbacks=callbacks)
+
+        trial.score = self.scorer(model, X_val, y_val)
+        trial.budget = rounds
+        trial.best_iteration = model.best_iteration_ or rounds
+        return trial
+
+    def _run_bracket(self, pool: ThreadPoolExecutor, n_configs: int, rounds: int, bracket: int, data: tuple):
+        survivors = self._sample(n_configs, self.random_state + bracket)
+
+        while survivors and not self._out_of_time():
+            rounds = min(rounds, self.max_resource)
+            logger.info(f"Bracket {bracket}: fitting {len(survivors)} configs with up to {rounds} rounds")
+
+            list(pool.map(lambda trial: self._fit_trial(trial, rounds, data), survivors))
+            self.n_fits_ += len(survivors)
+
+            for trial in survivors:
+                if self.best_ is None or trial.score > self.best_.score:
+                    self.best_ = trial
+                    self.time_to_best_ = time.perf_counter() - self._start
+
+            if rounds >= self.max_resource or len(survivors) <= 1:
+                break
+            survivors = sorted(survivors, key=lambda t: t.score, reverse=True)[:max(1, len(survivors) // self.eta)]
+            rounds *= self.eta
+
+    def fit(self, X, y) -> "HalvingSearch":
+        try:
+            X_fit, X_val, y_fit, y_val = train_test_split(
+                X, y, test_size=self.validation_size, stratify=y, random_state=self.random_state
+            )
+            data = (X_fit, y_fit, X_val, y_val)
+
+            self._start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.max_concurrent) as pool:
+                for bracket, (n_configs, rounds) in enumerate(self.brackets()):
+                    if self._out_of_time():
+                        logger.warning(f"Time budget of {self.time_budget_seconds}s reached, skipping remaining brackets")
+                        break
+                    self._run_bracket(pool, n_configs, rounds, bracket, data)
+            self.elapsed_ = time.perf_counter() - self._start
+
+            logger.info(f"Best trial {self.best_.trial_id} scored {self.best_.score:.4f} "
+                        f"after {self.time_to_best_:.1f}s, {self.n_fits_} fits in {self.elapsed_:.1f}s")
+
+            # refit the winner on the full training data with the rounds
+            # early stopping picked
+            self.best_estimator_ = lgb.LGBMClassifier(
+                **self.best_params_, class_weight=self.class_weight, random_state=self.random_state, verbose=-1,
+            ).fit(X, y)
+            return self
+
+        except Exception as e:
+            logger.error(f"Error during hyperparameter search : {e}")
+            raise CustomException("Failed to run hyperparameter search", e)
+
+    def summary(self) -> Dict[str, float]:
+        """Search statistics, logged to MLflow as metrics."""
+        return {
+            "search_trials": len(self.trials),
+            "search_fits": self.n_fits_,
+            "search_seconds": self.elapsed_,
+            "search_fits_per_sec": self.n_fits_ / max(self.elapsed_, 1e-9),
+            "search_time_to_best_seconds": self.time_to_best_,
+            "search_best_validation_score": self.best_.score,
+        }
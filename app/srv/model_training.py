@@ -1,8 +1,12 @@
 import os
 import json
+import shutil
+import filecmp
+from datetime import datetime, timezone
+from typing import Optional
 import pandas as pd
 import joblib
-from sklearn.model_selection import RandomizedSearchCV
+from sklearn.model_selection import RandomizedSearchCV, train_test_split
 from sklearn.base import BaseEstimator
 import lightgbm as lgb
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
@@ -11,6 +15,10 @@ from scipy.stats import randint
 import mlflow
 import mlflow.sklearn
 
+from app.srv.compiled_model import CompiledForest
+from app.srv.data_preprocessing import DataProcessor
+from app.srv.feature_transformer import FeatureTransformer
+from app.srv.hyperparameter_search import HalvingSearch
 from app.utils.logger import AppLogger
 from app.utils.error import CustomException
 from app.config.paths_config import *
@@ -31,6 +39,15 @@ class ModelTraining:
 
         self.params_dist = LIGHTGBM_PARAMS
         self.random_search_params = RANDOM_SEARCH_PARAMS
+        self.search_mode = SEARCH_MODE
+        self.halving_search_params = HALVING_SEARCH_PARAMS
+        self.search_metrics = {}
+        self.incremental_params = INCREMENTAL_PARAMS
+
+        # with balancing.method = class_weight the training data is left
+        # imbalanced and LightGBM weighs the classes instead
+        balancing = read_yaml(CONFIG_PATH)["data_processing"].get("balancing", {})
+        self.class_weight = "balanced" if balancing.get("method") == "class_weight" else None
 
     
     def load_and_split_data(self):
@@ -41,12 +58,11 @@ class ModelTraining:
             logger.info(f"Loading data from {self.test_path}")
             test_df = load_data(self.test_path)
 
-            X_train = train_df.drop(columns= ["booking_status"])
-            y_train = train_df["booking_status"]
-
+            y_train = train_df.pop("booking_status")
+            X_train = train_df
 
-            X_test = test_df.drop(columns= ["booking_status"])
-            y_test = test_df["booking_status"]
+            y_test = test_df.pop("booking_status")
+            X_test = test_df
 
             logger.info("Data Splitted successsfully")
 
@@ -58,9 +74,12 @@ class ModelTraining:
         
 
     def train_lgbm(self, X_train, y_train):
+        if self.search_mode != "random":
+            return self.train_lgbm_halving(X_train, y_train)
+
         try:
             logger.info("Initializing model")
-            model = lgb.LGBMClassifier(random_state=self.random_search_params["random_state"])
+            model = lgb.LGBMClassifier(random_state=self.random_search_params["random_state"], class_weight=self.class_weight)
             logger.info("Starting hyperparameter tuning")
             random_search = RandomizedSearchCV(
                 estimator=model,
@@ -93,6 +112,25 @@ class ModelTraining:
             raise CustomException("Failed to train lgbm model", e)
         
 
+    def train_lgbm_halving(self, X_train, y_train):
+        try:
+            logger.info(f"Starting {self.search_mode} hyperparameter search")
+
+            search = HalvingSearch(self.params_dist, mode=self.search_mode, class_weight=self.class_weight,
+                                   **self.halving_search_params)
+            search.fit(X_train, y_train)
+
+            self.search_metrics = search.summary()
+            logger.info(f"Search stats : {self.search_metrics}")
+            logger.info(f"Best paramters : {search.best_params_}")
+
+            return search.best_estimator_
+
+        except Exception as e:
+            logger.error(f"Error while training lgbm model : {e}")
+            raise CustomException("Failed to train lgbm model", e)
+
+
     def export_feature_list(self, X_test: pd.DataFrame):
         feature_schema = {
     col: str(dtype)
@@ -105,32 +143,32 @@ class ModelTraining:
     "schema": feature_schema
 }
 
-        with open(f"{APP_BASE_DIR}/features.json", "w") as f:
+        with open(FEATURES_PATH, "w") as f:
             json.dump(data, f, indent=4)
     
+    @staticmethod
+    def score_model(model: BaseEstimator, X: pd.DataFrame, y: pd.Series) -> dict:
+        y_pred = model.predict(X)
+        return {
+            "accuracy" : accuracy_score(y, y_pred),
+            "precision" : precision_score(y, y_pred),
+            "recall" : recall_score(y, y_pred),
+            "f1" : f1_score(y, y_pred)
+        }
+
     def evaluate_model(self, model: BaseEstimator, X_test: pd.DataFrame, y_test: pd.Series):
         try:
             logger.info("Evaluating model")
-            y_pred = model.predict(X_test)
-
-            accuracy = accuracy_score(y_test,y_pred)
-            precision = precision_score(y_test,y_pred)
-            recall = recall_score(y_test,y_pred)
-            f1 = f1_score(y_test,y_pred)
+            metrics = self.score_model(model, X_test, y_test)
 
-            logger.info(f"Accuracy Score :: {accuracy}")
-            logger.info(f"Precision Score :: {precision}")
-            logger.info(f"Recall Score :: {recall}")
-            logger.info(f"F1 Score :: {f1}")
+            logger.info(f"Accuracy Score :: {metrics['accuracy']}")
+            logger.info(f"Precision Score :: {metrics['precision']}")
+            logger.info(f"Recall Score :: {metrics['recall']}")
+            logger.info(f"F1 Score :: {metrics['f1']}")
 
             self.export_feature_list(X_test)
 
-            return {
-                "accuracy" : accuracy,
-                "precision" : precision,
-                "recall" : recall,
-                "f1" : f1
-            }
+            return metrics
 
 
         except Exception as e:
@@ -138,7 +176,12 @@ class ModelTraining:
             raise CustomException("Failed to evaluate model", e)
 
 
-    def export_model(self, model: BaseEstimator):
+    def export_model(self, model: BaseEstimator, transformer: Optional[FeatureTransformer] = None):
+        """
+        Save the model and the transform its features were encoded with:
+        `transformer` when given (incremental runs reuse the served one),
+        otherwise the one the processing stage just fitted.
+        """
         try:
             os.makedirs(os.path.dirname(self.model_output_path), exist_ok=True)
 
@@ -148,12 +191,195 @@ class ModelTraining:
 
             logger.info(f"Model saved to {self.model_output_path}")
 
+            if transformer is not None:
+                transformer.save(TRANSFORMER_OUTPUT_PATH)
+            elif os.path.exists(PROCESSED_TRANSFORMER_PATH):
+                shutil.copy2(PROCESSED_TRANSFORMER_PATH, TRANSFORMER_OUTPUT_PATH)
+                logger.info(f"Preprocessing transform saved to {TRANSFORMER_OUTPUT_PATH}")
+
         except Exception as e:
             logger.error(f"Error while saving the model : {e}")
             raise CustomException("Failed to save model", e)
+
+
+    def export_compiled_model(self, model: BaseEstimator, X_test: pd.DataFrame):
+        try:
+            logger.info("Compiling the model into NumPy arrays...")
+
+            compiled = CompiledForest.from_classifier(model)
+
+            max_diff = abs(compiled.predict_proba(X_test) - model.predict_proba(X_test)).max()
+            logger.info(f"Compiled model max probability difference :: {max_diff}")
+            if max_diff > 1e-9:
+                raise ValueError(f"Compiled model diverges from LightGBM by {max_diff}")
+
+            compiled.save(COMPILED_MODEL_OUTPUT_PATH)
+
+            logger.info(f"Compiled model saved to {COMPILED_MODEL_OUTPUT_PATH}")
+
+        except Exception as e:
+            logger.error(f"Error while compiling the model : {e}")
+            raise CustomException("Failed to compile model", e)
+
+
+    def publish_version(self) -> str:
+        try:
+            # microseconds keep two publishes within a second apart and
+            # still sort after the older second-resolution ids
+            version = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S%f")
+            version_dir = os.path.join(MODEL_VERSIONS_DIR, version)
+            staging_dir = f"{version_dir}.tmp"
+
+            logger.info(f"Publishing model version {version}")
+
+            if os.path.exists(version_dir):
+                raise FileExistsError(f"Model version {version} already exists in {MODEL_VERSIONS_DIR}")
+            # no exist_ok: a concurrent publish of the same id fails here
+            os.makedirs(staging_dir)
+            for artifact in self._version_artifacts():
+                shutil.copy2(artifact, staging_dir)
+
+            # the registry only picks up fully written version directories;
+            # renaming onto a non-empty directory fails rather than replacing it
+            os.rename(staging_dir, version_dir)
+
+            logger.info(f"Model version {version} published to {version_dir}")
+            return version
+
+        except Exception as e:
+            logger.error(f"Error while publishing the model version : {e}")
+            raise CustomException("Failed to publish model version", e)
+
+
+    def _version_artifacts(self) -> list:
+        candidates = [self.model_output_path, COMPILED_MODEL_OUTPUT_PATH, TRANSFORMER_OUTPUT_PATH]
+        return [str(artifact) for artifact in candidates if os.path.exists(artifact)]
+
+
+    def republish_version(self) -> str:
+        """
+        Called when the stage cache restores a model instead of training it:
+        the registry serves the newest version directory, so the restored
+        artifacts are published again unless that version already holds them.
+        """
+        try:
+            versions = sorted(
+                entry for entry in os.listdir(MODEL_VERSIONS_DIR)
+                if not entry.endswith(".tmp") and os.path.isdir(os.path.join(MODEL_VERSIONS_DIR, entry))
+            ) if os.path.isdir(MODEL_VERSIONS_DIR) else []
+
+            if versions:
+                newest_dir = os.path.join(MODEL_VERSIONS_DIR, versions[-1])
+                artifacts = self._version_artifacts()
+                published = sorted(os.listdir(newest_dir))
+                if published == sorted(os.path.basename(a) for a in artifacts) and all(
+                    filecmp.cmp(a, os.path.join(newest_dir, os.path.basename(a)), shallow=False) for a in artifacts
+                ):
+                    logger.info(f"Restored model is already the newest version {versions[-1]}")
+                    return versions[-1]
+
+            return self.publish_version()
+
+        except Exception as e:
+            logger.error(f"Error while republishing the restored model : {e}")
+            raise CustomException("Failed to republish the restored model", e)
         
 
 
+    def continue_training(self, current: lgb.LGBMClassifier, X_train: pd.DataFrame, y_train: pd.Series):
+        try:
+            params = {**current.get_params(), "n_estimators": self.incremental_params["n_estimators"]}
+            if self.incremental_params.get("learning_rate") is not None:
+                params["learning_rate"] = self.incremental_params["learning_rate"]
+
+            logger.info(f"Continuing boosting for {params['n_estimators']} rounds on {len(X_train)} new rows")
+            model = lgb.LGBMClassifier(**params)
+            model.fit(X_train, y_train, init_model=current.booster_)
+            return model
+
+        except Exception as e:
+            logger.error(f"Error while continuing training : {e}")
+            raise CustomException("Failed to continue training the lgbm model", e)
+
+
+    def should_promote(self, current_metrics: dict, updated_metrics: dict) -> bool:
+        """True when no promotion metric regressed on any holdout."""
+        tolerance = self.incremental_params["max_regression"]
+        promote = True
+        for holdout, metrics in updated_metrics.items():
+            for name in self.incremental_params["promotion_metrics"]:
+                delta = metrics[name] - current_metrics[holdout][name]
+                logger.info(f"{holdout} holdout {name} :: {current_metrics[holdout][name]:.4f} -> {metrics[name]:.4f} ({delta:+.4f})")
+                if delta < -tolerance:
+                    promote = False
+        return promote
+
+
+    def run_incremental(self, partition_path: str) -> bool:
+        """
+        Warm-start retrain: continue boosting the current model on one new
+        raw partition, encoded with the transform persisted next to the
+        model, and promote it only if the holdout metrics do not regress.
+        """
+        try:
+            with mlflow.start_run():
+                logger.info(f"Starting incremental training on {partition_path}")
+                start = datetime.now(timezone.utc)
+
+                current = joblib.load(self.model_output_path)
+                transformer = FeatureTransformer.load(TRANSFORMER_OUTPUT_PATH)
+
+                processor = DataProcessor(partition_path, self.test_path, PROCESSED_DIR, CONFIG_PATH)
+                new_df = processor.process_partition(partition_path, transformer)
+
+                fit_df, holdout_df = train_test_split(
+                    new_df, test_size=self.incremental_params["holdout_size"],
+                    stratify=new_df["booking_status"], random_state=self.incremental_params["random_state"]
+                )
+                # the same balancing as the full run, on the training share only
+                fit_df = processor.balance_data(fit_df.copy())
+                y_fit = fit_df.pop("booking_status")
+
+                holdouts = {"new": holdout_df}
+                if os.path.exists(self.test_path):
+                    holdouts["previous"] = load_data(self.test_path)[holdout_df.columns]
+
+                model = self.continue_training(current, fit_df, y_fit)
+
+                current_metrics, updated_metrics = {}, {}
+                for name, df in holdouts.items():
+                    X, y = df.drop(columns="booking_status"), df["booking_status"]
+                    current_metrics[name] = self.score_model(current, X, y)
+                    updated_metrics[name] = self.score_model(model, X, y)
+
+                promoted = self.should_promote(current_metrics, updated_metrics)
+
+                if promoted:
+                    logger.info("No holdout regression, promoting the updated model")
+                    self.export_model(model, transformer)
+                    self.export_compiled_model(model, holdout_df.drop(columns="booking_status"))
+                    version = self.publish_version()
+                    mlflow.log_artifact(self.model_output_path)
+                    mlflow.log_artifact(COMPILED_MODEL_OUTPUT_PATH)
+                    mlflow.set_tag("model_version", version)
+                else:
+                    logger.warning("Updated model regressed on a holdout, keeping the current model")
+
+                for name in holdouts:
+                    mlflow.log_metrics({f"{name}_{k}": v for k, v in updated_metrics[name].items()})
+                    mlflow.log_metrics({f"{name}_current_{k}": v for k, v in current_metrics[name].items()})
+                mlflow.log_params({"incremental_" + k: v for k, v in self.incremental_params.items()})
+                mlflow.log_metric("incremental_rows", len(new_df))
+                mlflow.set_tags({"training_mode": "incremental", "promoted": promoted})
+
+                logger.info(f"Incremental training completed in {(datetime.now(timezone.utc) - start).total_seconds():.1f}s")
+                return promoted
+
+        except Exception as e:
+            logger.error(f"Error while running incremental training : {e}")
+            raise CustomException("Failed to run incremental training", e)
+
+
     def run(self):
         try:
             with mlflow.start_run():
@@ -172,13 +398,20 @@ class ModelTraining:
                 metrics = self.evaluate_model(model, X_test, y_test)
 
                 self.export_model(model)
+                self.export_compiled_model(model, X_test)
+                version = self.publish_version()
 
                 logger.info("Logging the model to MLFLOW")
                 mlflow.log_artifact(self.model_output_path)
+                mlflow.log_artifact(COMPILED_MODEL_OUTPUT_PATH)
+                if os.path.exists(TRANSFORMER_OUTPUT_PATH):
+                    mlflow.log_artifact(TRANSFORMER_OUTPUT_PATH)
 
                 logger.info("Logging Params and Metrics to MLFLOW")
                 mlflow.log_params(model.get_params())
                 mlflow.log_metrics(metrics)
+                mlflow.log_metrics(self.search_metrics)
+                mlflow.set_tag("model_version", version)
 
                 logger.info("Model training completed")
         except Exception as e:
@@ -0,0 +1,187 @@
+import base64
+import hashlib
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.utils.logger import AppLogger
+from app.utils.error import CustomException
+
+logger = AppLogger(__name__)()
+
+
+class StorageBackend:
+    """
+    Minimal read interface over an object store. `md5` is the base64
+    MD5 digest the store keeps for the object, or None when it has none.
+    """
+
+    def size(self, name: str) -> int:
+        raise NotImplementedError
+
+    def md5(self, name: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def generation(self, name: str) -> str:
+        """Changes whenever the object is rewritten; used to invalidate partial downloads."""
+        raise NotImplementedError
+
+    def read_range(self, name: str, start: int, end: int) -> bytes:
+        """Bytes [start, end) of the object."""
+        raise NotImplementedError
+
+
+class GCSBackend(StorageBackend):
+
+    def __init__(self, bucket_name: str):
+        from google.cloud import storage
+
+        self.bucket = storage.Client().bucket(bucket_name)
+        self._blobs = {}
+
+    def _blob(self, name: str):
+        if name not in self._blobs:
+            blob = self.bucket.get_blob(name)
+            if blob is None:
+                raise FileNotFoundError(f"gs://{self.bucket.name}/{name} does not exist")
+            self._blobs[name] = blob
+        return self._blobs[name]
+
+    def size(self, name: str) -> int:
+        return self._blob(name).size
+
+    def md5(self, name: str) -> Optional[str]:
+        return self._blob(name).md5_hash
+
+    def generation(self, name: str) -> str:
+        return str(self._blob(name).generation)
+
+    def read_range(self, name: str, start: int, end: int) -> bytes:
+        # GCS ranges are inclusive; pinning the generation keeps every
+        # chunk on the same object version
+        blob = self._blob(name)
+        return blob.download_as_bytes(start=start, end=end - 1, if_generation_match=blob.generation)
+
+
+class LocalBackend(StorageBackend):
+    """Serves objects from a local directory, a stand-in for the bucket in tests."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def size(self, name: str) -> int:
+        return os.path.getsize(self._path(name))
+
+    def md5(self, name: str) -> Optional[str]:
+        digest = hashlib.md5()
+        with open(self._path(name), "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return base64.b64encode(digest.digest()).decode()
+
+    def generation(self, name: str) -> str:
+        stat = os.stat(self._path(name))
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def read_range(self, name: str, start: int, end: int) -> bytes:
+        with open(self._path(name), "rb") as f:
+            f.seek(start)
+            return f.read(end - start)
+
+
+class RangedDownloader:
+    """
+    Downloads an object as fixed-size byte ranges fetched in parallel and
+    written in place into <target>.part.
+
+    Completed chunk indices are recorded in <target>.part.json, so an
+    interrupted download resumes with only the missing chunks, as long as
+    the object's generation has not changed. The assembled file is checked
+    against the store's MD5 before it replaces the target.
+    """
+
+    def __init__(self, backend: StorageBackend, chunk_size: int = 8 * 1024 * 1024, workers: int = 8):
+        self.backend = backend
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self._lock = threading.Lock()
+
+    def _load_state(self, state_path: str, generation: str, size: int) -> set:
+        if not os.path.exists(state_path):
+            return set()
+        with open(state_path) as f:
+            state = json.load(f)
+        if state.get("generation") != generation or state.get("size") != size or state.get("chunk_size") != self.chunk_size:
+            logger.info("Source object changed since the partial download, starting over")
+            return set()
+        return set(state["done"])
+
+    def _save_state(self, state_path: str, generation: str, size: int, done: set):
+        with open(f"{state_path}.tmp", "w") as f:
+            json.dump({"generation": generation, "size": size, "chunk_size": self.chunk_size, "done": sorted(done)}, f)
+        os.replace(f"{state_path}.tmp", state_path)
+
+    @staticmethod
+    def verify(path: str, expected_md5: Optional[str]):
+        if expected_md5 is None:
+            logger.warning(f"No checksum published for {path}, skipping verification")
+            return
+
+        digest = hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        actual = base64.b64encode(digest.digest()).decode()
+        if actual != expected_md5:
+            raise ValueError(f"Checksum mismatch for {path}: expected md5 {expected_md5}, got {actual}")
+
+    def download(self, name: str, target: str):
+        try:
+            size = self.backend.size(name)
+            generation = self.backend.generation(name)
+            part_path, state_path = f"{target}.part", f"{target}.part.json"
+
+            done = self._load_state(state_path, generation, size)
+            if not done or not os.path.exists(part_path):
+                done = set()
+                os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+                with open(part_path, "wb") as f:
+                    f.truncate(size)
+
+            n_chunks = max(1, -(-size // self.chunk_size))
+            pending = [i for i in range(n_chunks) if i not in done]
+            logger.info(f"Downloading {name}: {size} bytes in {n_chunks} chunks, {len(done)} already on disk")
+
+            def fetch(index: int):
+                start = index * self.chunk_size
+                data = self.backend.read_range(name, start, min(start + self.chunk_size, size))
+                with open(part_path, "r+b") as f:
+                    f.seek(start)
+                    f.write(data)
+                with self._lock:
+                    done.add(index)
+                    self._save_state(state_path, generation, size, done)
+
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                list(pool.map(fetch, pending))
+
+            try:
+                self.verify(part_path, self.backend.md5(name))
+            except ValueError:
+                # a corrupt file must not be resumed from
+                os.remove(state_path)
+                raise
+
+            shutil.move(part_path, target)
+            os.remove(state_path)
+            logger.info(f"{name} downloaded and verified to {target}")
+
+        except Exception as e:
+            logger.error(f"Error while downloading {name} : {e}")
+            raise CustomException(f"Failed to download {name}", e)
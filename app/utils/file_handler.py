@@ -1,4 +1,6 @@
 import os
+from typing import Dict, List, Optional
+
 import pandas as pd
 from .logger import AppLogger
 from .error import CustomException
@@ -22,10 +24,156 @@ def read_yaml(file_path: str):
 
 
 
-def load_data(path: str):
+def _in_file_order(names: List[str], columns: Optional[List[str]]) -> Optional[List[str]]:
+    # projected columns come back in file order, the same as read_csv(usecols=...)
+    return None if columns is None else [name for name in names if name in set(columns)]
+
+
+class CSVFormat:
+    extension = "csv"
+
+    def write(self, df: pd.DataFrame, path: str):
+        df.to_csv(path, index=False)
+
+    def read(self, path: str, columns: Optional[List[str]] = None, memory_map: bool = False,
+             dtypes: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        # numeric columns are parsed straight into their schema dtype; the
+        # category ones are converted after parsing so numeric labels keep
+        # their type
+        numeric = {col: dtype for col, dtype in (dtypes or {}).items() if dtype != "category"}
+        return pd.read_csv(path, usecols=columns, memory_map=memory_map, dtype=numeric)
+
+
+class ParquetFormat:
+    """Typed, compressed columnar files; column projection skips unread columns on disk."""
+
+    extension = "parquet"
+
+    def write(self, df: pd.DataFrame, path: str):
+        df.to_parquet(path, index=False)
+
+    def read(self, path: str, columns: Optional[List[str]] = None, memory_map: bool = False,
+             dtypes: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        import pyarrow.parquet as pq
+
+        columns = _in_file_order(pq.read_schema(path).names, columns)
+        return pq.read_table(path, columns=columns, memory_map=memory_map).to_pandas()
+
+
+class FeatherFormat:
+    """Arrow IPC files, written uncompressed so memory-mapped reads do not copy."""
+
+    extension = "feather"
+
+    def write(self, df: pd.DataFrame, path: str):
+        df.reset_index(drop=True).to_feather(path, compression="uncompressed")
+
+    def read(self, path: str, columns: Optional[List[str]] = None, memory_map: bool = False,
+             dtypes: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        with pa.ipc.open_file(path) as reader:
+            columns = _in_file_order(reader.schema.names, columns)
+        return feather.read_table(path, columns=columns, memory_map=memory_map).to_pandas()
+
+
+FORMATS = {fmt.extension: fmt for fmt in (CSVFormat(), ParquetFormat(), FeatherFormat())}
+
+
+def artifact_format(path: str):
+    extension = os.path.splitext(str(path))[1].lstrip(".").lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported artifact format '{extension}', expected one of {list(FORMATS)}")
+    return FORMATS[extension]
+
+
+def schema_dtypes(processing_config: dict) -> Dict[str, str]:
+    """Column -> dtype map from config.yaml's data_processing section."""
+    overrides = processing_config.get("column_dtypes") or {}
+    dtypes = {col: overrides.get(col, "float32") for col in processing_config["numerical_columns"]}
+    dtypes.update({col: "category" for col in processing_config["categorical_columns"]})
+    return dtypes
+
+
+def apply_schema(df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+    """Cast, in place, only the columns whose dtype differs from the schema."""
+    for col, dtype in dtypes.items():
+        if col in df.columns and str(df[col].dtype) != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+class ChunkWriter:
+    """Appends DataFrame chunks to a CSV, Parquet or Feather file as they arrive."""
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self.extension = artifact_format(path).extension
+        self._writer = None
+        self._schema = None
+        self._wrote_header = False
+        self.rows = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    def write(self, df: pd.DataFrame):
+        self.rows += len(df)
+        if self.extension == "csv":
+            df.to_csv(self.path, mode="a" if self._wrote_header else "w", header=not self._wrote_header, index=False)
+            self._wrote_header = True
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema
+            if self.extension == "parquet":
+                self._writer = pq.ParquetWriter(self.path, self._schema)
+            else:
+                self._writer = pa.ipc.new_file(self.path, self._schema)
+        elif not table.schema.equals(self._schema):
+            table = table.cast(self._schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def compact_dtypes(df: pd.DataFrame, categorical_columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Store categorical columns as category and integers in the smallest type that fits."""
+    for col in categorical_columns or []:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype("category")
+    for col in df.select_dtypes(include="integer").columns:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+
+def save_data(df: pd.DataFrame, path: str, categorical_columns: Optional[List[str]] = None):
+    try:
+        logger.info(f"Saving Data to {path}")
+        os.makedirs(os.path.dirname(str(path)), exist_ok=True)
+        artifact_format(path).write(compact_dtypes(df, categorical_columns), path)
+    except Exception as e:
+        logger.error(f"Error saving data {e}")
+        raise CustomException("Failed to save data", e)
+
+
+def load_data(path: str, columns: Optional[List[str]] = None, memory_map: bool = False,
+              dtypes: Optional[Dict[str, str]] = None):
+    """
+    Read a dataset in the format given by its extension; `columns` reads
+    only those columns, `memory_map` maps the file instead of reading it
+    and `dtypes` (see schema_dtypes) types the columns while loading.
+    """
     try:
         logger.info("Loading Data")
-        return pd.read_csv(path)
+        df = artifact_format(path).read(path, columns=columns, memory_map=memory_map, dtypes=dtypes)
+        return apply_schema(df, dtypes) if dtypes else df
     except Exception as e:
         logger.error(f"Error loading data {e}")
-        raise CustomException("Failed to load data", e)
\ No newline at end of file
+        raise CustomException("Failed to load data", e)
@@ -1,5 +1,15 @@
+import copy
+import json
 import logging
+import os
+import queue
 import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from app.config.secrets import SecretManager
 
 class ColoredFormatter(logging.Formatter):
     # ANSI color codes
@@ -13,21 +23,167 @@ class ColoredFormatter(logging.Formatter):
     RESET = '\033[0m'
 
     def format(self, record):
+        # colored on a copy, other handlers of the record keep the plain level
+        record = copy.copy(record)
         log_color = self.COLORS.get(record.levelname, '')
         record.levelname = f"{log_color}{record.levelname}{self.RESET}"
         return super().format(record)
 
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed through `extra` are kept."""
+
+    # attributes of every LogRecord, anything else came from `extra`;
+    # uvicorn passes an ANSI-colored copy of its message as color_message
+    RESERVED = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "color_message"}
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in self.RESERVED:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most `per_second` records per second from each call
+    site below WARNING. The rest are dropped, and the next record from the
+    same call site carries how many as `suppressed`.
+    """
+
+    def __init__(self, per_second: int):
+        super().__init__()
+        self.per_second = per_second
+        # (logger, line) -> [second, records passed in it, suppressed since the last one passed]
+        self._sites: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.per_second <= 0 or record.levelno >= logging.WARNING:
+            return True
+
+        second = int(record.created)
+        with self._lock:
+            site = self._sites.setdefault((record.name, record.lineno), [second, 0, 0])
+            if site[0] != second:
+                site[0], site[1] = second, 0
+            if site[1] >= self.per_second:
+                site[2] += 1
+                return False
+            site[1] += 1
+            suppressed, site[2] = site[2], 0
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+class AsyncHandler(QueueHandler):
+    """
+    Puts records on a bounded queue that a background thread formats and
+    writes, so the caller never waits on the stream. Records that do not
+    fit are dropped, and the next one queued carries how many as `dropped`.
+    """
+
+    def __init__(self, target: logging.Handler, max_queue: int):
+        super().__init__(queue.Queue(max_queue))
+        self.target = target
+        self.listener: Optional[QueueListener] = None
+        self.dropped = 0
+        self._start_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # the writer thread does not survive a fork, the child starts its own
+        self.queue = queue.Queue(self.queue.maxsize)
+        self.listener = None
+        self.dropped = 0
+        self._start_lock = threading.Lock()
+
+    def _start(self):
+        with self._start_lock:
+            if self.listener is None:
+                self.listener = QueueListener(self.queue, self.target)
+                self.listener.start()
+
+    def prepare(self, record):
+        # the message and traceback are rendered while their arguments and
+        # frames are still valid, the JSON on the writer thread
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = self.target.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self.listener is None:
+            self._start()
+        # records are logged from request, executor and shadow threads at
+        # once; the handler lock is reentrant, held already when called
+        # through handle() and reset by logging itself after a fork
+        with self.lock:
+            dropped = self.dropped
+            if dropped:
+                record.dropped = dropped
+            try:
+                self.queue.put_nowait(record)
+                self.dropped = 0
+            except queue.Full:
+                self.dropped += 1
+
+    def close(self):
+        # logging.shutdown() at exit drains what is still queued
+        if self.listener is not None:
+            try:
+                self.listener.stop()
+            except queue.Full:
+                pass
+            self.listener = None
+        super().close()
+
+_async_handler: Optional[AsyncHandler] = None
+_async_handler_lock = threading.Lock()
+
+def _log_format() -> str:
+    if SecretManager.LOG_FORMAT == "auto":
+        return "console" if SecretManager.ENV.is_local else "json"
+    return SecretManager.LOG_FORMAT
+
+def _shared_async_handler() -> AsyncHandler:
+    global _async_handler
+    with _async_handler_lock:
+        if _async_handler is None:
+            target = logging.StreamHandler(sys.stdout)
+            target.setFormatter(JsonFormatter())
+            _async_handler = AsyncHandler(target, SecretManager.LOG_QUEUE_SIZE)
+            _async_handler.addFilter(RateLimitFilter(SecretManager.LOG_RATE_LIMIT_PER_SECOND))
+        return _async_handler
+
 class AppLogger:
     def __init__(self, service_name: str, level: int = logging.INFO):
         self._logger = logging.getLogger(service_name)
         self._logger.setLevel(level)
 
         if not self._logger.handlers:
-            handler = logging.StreamHandler(sys.stdout)
-            formatter = ColoredFormatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
+            if _log_format() == "json":
+                # one queue and writer thread per process, shared by every logger
+                handler = _shared_async_handler()
+            else:
+                handler = logging.StreamHandler(sys.stdout)
+                formatter = ColoredFormatter(
+                    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+                )
+                handler.setFormatter(formatter)
             self._logger.addHandler(handler)
             self._logger.propagate = False
 
@@ -0,0 +1,31 @@
+import resource
+import sys
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process, in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def reset_peak_rss() -> bool:
+    """
+    Reset the peak RSS high-water mark so the next peak_rss_mb() covers
+    only what runs after this call. Linux only; returns False elsewhere,
+    where the peak stays the process-wide maximum.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,322 @@
+import bisect
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def dump(self) -> dict:
+        """Raw values of this process, merged across workers by MetricsRegistry."""
+        with self._lock:
+            values = [[list(key), value] for key, value in self._values.items()]
+        return {"kind": self.kind, "documentation": self.documentation, "labelnames": list(self.labelnames), "values": values}
+
+    def load(self, values: list) -> None:
+        """Add the values of another process's dump to this metric."""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def load(self, values: list) -> None:
+        for key, value in values:
+            self._values[tuple(key)] = self._values.get(tuple(key), 0) + value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}_total{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def load(self, values: list) -> None:
+        # summed over live workers: in-flight requests, cache entries and
+        # model_info (workers serving each version) all add up
+        for key, value in values:
+            self._values[tuple(key)] = self._values.get(tuple(key), 0) + value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Iterable[float], labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[idx] += 1
+            total[0] += value
+
+    def dump(self) -> dict:
+        with self._lock:
+            values = [[list(key), [list(counts), total[0]]] for key, (counts, total) in self._values.items()]
+        return {"kind": self.kind, "documentation": self.documentation, "labelnames": list(self.labelnames),
+                "buckets": list(self.buckets), "values": values}
+
+    def load(self, values: list) -> None:
+        for key, (counts, total) in values:
+            own_counts, own_total = self._values.setdefault(tuple(key), ([0] * (len(self.buckets) + 1), [0.0]))
+            for i, count in enumerate(counts):
+                own_counts[i] += count
+            own_total[0] += total
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+# counters and histograms of exited workers, folded into one dump
+RETIRED_DUMP = "retired.json"
+
+
+class _DirectoryLock:
+    """flock on the multiprocess directory: merges share it, retire_process takes it alone."""
+
+    def __init__(self, directory: str, exclusive: bool = False):
+        self.path = os.path.join(directory, ".lock")
+        self.operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+
+    def __enter__(self):
+        self._file = open(self.path, "a")
+        fcntl.flock(self._file, self.operation)
+        return self
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+
+def _read_dump(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge_dumps(dumps: Iterable[Tuple[dict, bool]]) -> Dict[str, _Metric]:
+    """Sum (dump, process alive) pairs into fresh metrics; gauges of exited processes are dropped."""
+    kinds = {cls.kind: cls for cls in (Counter, Gauge, Histogram)}
+    merged: Dict[str, _Metric] = {}
+    for process_dump, alive in dumps:
+        for name, dump in process_dump.items():
+            if dump["kind"] == "gauge" and not alive:
+                continue
+            if name not in merged:
+                cls = kinds[dump["kind"]]
+                args = (name, dump["documentation"], dump["buckets"]) if cls is Histogram else (name, dump["documentation"])
+                merged[name] = cls(*args, labelnames=dump["labelnames"])
+            merged[name].load(dump["values"])
+    return merged
+
+
+def retire_process(directory: str, pid: int):
+    """
+    Fold the last dump of an exited process into the retired dump and
+    delete it, so the directory holds one file per live worker while the
+    merged counters never go backwards.
+    """
+    path = os.path.join(directory, f"{pid}.json")
+    with _DirectoryLock(directory, exclusive=True):
+        dump = _read_dump(path)
+        if dump is None:
+            return
+        retired_path = os.path.join(directory, RETIRED_DUMP)
+        merged = _merge_dumps([(_read_dump(retired_path) or {}, False), (dump, False)])
+        with open(f"{retired_path}.tmp", "w") as f:
+            json.dump({name: metric.dump() for name, metric in merged.items()}, f)
+        os.replace(f"{retired_path}.tmp", retired_path)
+        os.remove(path)
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered in the Prometheus text exposition
+    format.
+
+    Observations are only ever recorded in process memory. With
+    `multiprocess_dir` set, every process also dumps its raw values to
+    <dir>/<pid>.json every `flush_interval` seconds, and render() merges
+    the dumps of all processes sharing the directory, so a scrape of any
+    uvicorn worker reports the whole server. Gauges of processes that have
+    exited are dropped; their counters and histograms are kept, folded
+    into a single dump by retire_process() once the process is reaped, or
+    at the next scrape that finds it gone.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self.multiprocess_dir: Optional[str] = None
+        self._flusher: Optional[threading.Thread] = None
+        self._flush_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # the flusher thread does not survive a fork, a worker starts its own
+        self._flusher = None
+        self._flush_lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, buckets: Iterable[float], labelnames: Sequence[str] = ()) -> Histogram:
+        return self.register(Histogram(name, documentation, buckets, labelnames))
+
+    def enable_multiprocess(self, directory: str, flush_interval: float = 1.0):
+        os.makedirs(directory, exist_ok=True)
+        self.multiprocess_dir = directory
+        self.flush()
+
+        if self._flusher is None:
+            def flush_forever():
+                while True:
+                    time.sleep(flush_interval)
+                    self.flush()
+
+            self._flusher = threading.Thread(target=flush_forever, name="metrics-flush", daemon=True)
+            self._flusher.start()
+
+    def flush(self):
+        """Write this process's raw values for the other workers to merge."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        path = os.path.join(self.multiprocess_dir, f"{os.getpid()}.json")
+        # the flusher thread and a final flush at exit write the same file
+        with self._flush_lock:
+            with open(f"{path}.tmp", "w") as f:
+                json.dump({metric.name: metric.dump() for metric in metrics}, f)
+            os.replace(f"{path}.tmp", path)
+
+    def _merged(self) -> List[_Metric]:
+        self.flush()
+        dumps, exited = [], []
+        with _DirectoryLock(self.multiprocess_dir):
+            for path in sorted(glob.glob(os.path.join(self.multiprocess_dir, "*.json"))):
+                dump = _read_dump(path)
+                if dump is None:
+                    continue
+                # <pid>.json of a worker, or the retired dump
+                stem = os.path.basename(path).split(".")[0]
+                alive = stem.isdigit() and _pid_alive(int(stem))
+                if stem.isdigit() and not alive:
+                    exited.append(int(stem))
+                dumps.append((dump, alive))
+        # workers of a supervisor that does not retire them (uvicorn --workers)
+        for pid in exited:
+            retire_process(self.multiprocess_dir, pid)
+        return list(_merge_dumps(dumps).values())
+
+    def render(self) -> str:
+        if self.multiprocess_dir:
+            metrics = self._merged()
+        else:
+            with self._lock:
+                metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
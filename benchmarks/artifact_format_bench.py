@@ -0,0 +1,59 @@
+"""
+Compare the dataset artifact formats on load time and on-disk size.
+
+    python -m benchmarks.artifact_format_bench --source notebook/train.csv --scale 10
+
+Writes the source dataset (repeated --scale times) in every format of
+app.utils.file_handler, then times full reads, a projected read of a few
+columns, and memory-mapped reads.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from app.config.paths_config import CONFIG_PATH
+from app.utils.file_handler import FORMATS, compact_dtypes, read_yaml, load_data
+
+PROJECTED_COLUMNS = ["lead_time", "avg_price_per_room", "booking_status"]
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default="notebook/train.csv")
+    parser.add_argument("--scale", type=int, default=10, help="repeat the source rows this many times")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    categorical_columns = read_yaml(CONFIG_PATH)["data_processing"]["categorical_columns"]
+    df = pd.read_csv(args.source).drop(columns=["Unnamed: 0"], errors="ignore")
+    df = pd.concat([df] * args.scale, ignore_index=True)
+    df = compact_dtypes(df, categorical_columns)
+    print(f"{len(df):,} rows x {df.shape[1]} columns\n")
+
+    print(f"{'format':<10}{'size MB':>10}{'full s':>10}{'mmap s':>10}{'3 cols s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for extension, fmt in FORMATS.items():
+            path = os.path.join(tmp, f"data.{extension}")
+            fmt.write(df, path)
+
+            size = os.path.getsize(path) / 1e6
+            full = best_of(lambda: load_data(path), args.repeat)
+            mapped = best_of(lambda: load_data(path, memory_map=True), args.repeat)
+            projected = best_of(lambda: load_data(path, columns=PROJECTED_COLUMNS, memory_map=True), args.repeat)
+            print(f"{extension:<10}{size:>10.2f}{full:>10.3f}{mapped:>10.3f}{projected:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
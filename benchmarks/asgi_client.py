@@ -0,0 +1,77 @@
+import asyncio
+from typing import Iterable, List, Tuple
+
+
+class ASGIClient:
+    """
+    Minimal in-process HTTP client that calls an ASGI app directly, so the
+    benchmarks measure the service without socket or client overhead.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._lifespan = None
+
+    async def startup(self):
+        """Run the app's lifespan startup (model load, warm-up), as a server does before serving."""
+        events, replies = asyncio.Queue(), asyncio.Queue()
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        self._lifespan = (asyncio.ensure_future(self.app(scope, events.get, replies.put)), events, replies)
+
+        await events.put({"type": "lifespan.startup"})
+        reply = await replies.get()
+        if reply["type"] != "lifespan.startup.complete":
+            raise RuntimeError(f"Lifespan startup failed: {reply.get('message', '')}")
+
+    async def shutdown(self):
+        if self._lifespan is None:
+            return
+        task, events, replies = self._lifespan
+        await events.put({"type": "lifespan.shutdown"})
+        await replies.get()
+        await task
+        self._lifespan = None
+
+    async def request(self, method: str, path: str, body: bytes = b"",
+                      headers: Iterable[Tuple[str, str]] = ()) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+        path, _, query = path.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(b"content-length", str(len(body)).encode())]
+                       + [(k.lower().encode(), v.encode()) for k, v in headers],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+        }
+
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return {"type": "http.disconnect"}
+
+        status, response_headers, chunks = 0, [], []
+
+        async def send(message):
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return status, response_headers, b"".join(chunks)
+
+    async def post_json(self, path: str, body: bytes):
+        return await self.request("POST", path, body, headers=[("content-type", "application/json")])
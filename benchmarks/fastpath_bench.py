@@ -0,0 +1,101 @@
+"""
+Compare the pydantic request path with the raw-body fast path.
+
+    python -m benchmarks.fastpath_bench --requests 2000 --batch-size 1000
+
+Reports parse-only throughput (body bytes -> feature matrix) and
+end-to-end requests/sec through the ASGI app, in process.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import numpy as np
+
+# isolate parsing cost from the prediction cache
+os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")
+
+from app.srv.api import fastpath
+from app.srv.api.dto import FEATURE_COLUMNS, PredictionInput, BatchPredictionInput
+
+
+def synthetic_rows(n_rows: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n_rows):
+        row = {col: int(rng.integers(0, 5)) for col in FEATURE_COLUMNS}
+        row.update(
+            lead_time=int(rng.integers(0, 400)),
+            avg_price_per_room=round(float(rng.uniform(40, 250)), 2),
+            arrival_month=int(rng.integers(1, 13)),
+            arrival_date=int(rng.integers(1, 29)),
+        )
+        rows.append(row)
+    return rows
+
+
+def per_second(fn, body: bytes, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(body)
+    return repeat / (time.perf_counter() - start)
+
+
+def bench_parsing(single: bytes, columnar: bytes, row_major: bytes, repeat: int):
+    results = {
+        "single / pydantic": per_second(lambda b: PredictionInput.model_validate_json(b).to_numpy(), single, repeat),
+        "single / fastpath": per_second(fastpath.parse_single, single, repeat),
+        "batch columnar / pydantic": per_second(lambda b: BatchPredictionInput.model_validate_json(b).to_numpy(), columnar, max(repeat // 100, 5)),
+        "batch columnar / fastpath": per_second(fastpath.parse_batch, columnar, max(repeat // 100, 5)),
+        "batch rows / fastpath": per_second(fastpath.parse_batch, row_major, max(repeat // 100, 5)),
+    }
+    print("\nParse only (bodies/sec)")
+    for name, value in results.items():
+        print(f"  {name:<28} {value:>12,.0f}")
+
+
+async def bench_endpoints(single: bytes, columnar: bytes, row_major: bytes, repeat: int):
+    from benchmarks.asgi_client import ASGIClient
+    from main import app
+
+    client = ASGIClient(app)
+    await client.startup()
+
+    async def rps(path: str, body: bytes, n: int) -> float:
+        status, _, _ = await client.post_json(path, body)
+        assert status == 200, f"{path} returned {status}"
+        start = time.perf_counter()
+        for _ in range(n):
+            await client.post_json(path, body)
+        return n / (time.perf_counter() - start)
+
+    batch_repeat = max(repeat // 100, 5)
+    results = {
+        "/api/predict": await rps("/api/predict", single, repeat),
+        "/api/predict/fast": await rps("/api/predict/fast", single, repeat),
+        "/api/predict/batch": await rps("/api/predict/batch", columnar, batch_repeat),
+        "/api/predict/batch/fast (columnar)": await rps("/api/predict/batch/fast", columnar, batch_repeat),
+        "/api/predict/batch/fast (rows)": await rps("/api/predict/batch/fast", row_major, batch_repeat),
+    }
+    print("\nEnd to end, in process (requests/sec)")
+    for name, value in results.items():
+        print(f"  {name:<36} {value:>10,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--parse-only", action="store_true", help="skip the end-to-end run (no model needed)")
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.batch_size)
+    single = json.dumps(rows[0]).encode()
+    columnar = json.dumps({col: [row[col] for row in rows] for col in FEATURE_COLUMNS}).encode()
+    row_major = json.dumps([[row[col] for col in FEATURE_COLUMNS] for row in rows]).encode()
+
+    bench_parsing(single, columnar, row_major, args.requests)
+    if not args.parse_only:
+        asyncio.run(bench_endpoints(single, columnar, row_major, args.requests))
@@ -0,0 +1,388 @@
+"""
+Replay a request corpus against the prediction API and report latency
+percentiles and the highest throughput that stays within a latency SLO.
+
+    python -m benchmarks.load_test                                   # in process, synthetic corpus
+    python -m benchmarks.load_test --target http://127.0.0.1:8080 --concurrency 1 8 32 64
+    python -m benchmarks.load_test --output results.json --compare baseline.json
+
+The corpus is JSON lines, one request per line:
+
+    {"scenario": "predict", "method": "POST", "path": "/api/predict",
+     "headers": {"content-type": "application/json"}, "body": {...}}
+
+Binary bodies (msgpack, Arrow) are stored base64 encoded under "body_b64".
+Without --corpus, one is generated from rows of notebook/train.csv for
+every prediction route and batch format; --write-corpus saves it.
+
+Every scenario is run closed loop at each concurrency level: that many
+clients send requests back to back for --duration seconds. The in-process
+target calls the ASGI app directly, so clients and server share one event
+loop and one core; use a uvicorn target to measure real concurrency.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+from app.config.paths_config import APP_BASE_DIR
+
+SAMPLE_PATH = APP_BASE_DIR / "notebook/train.csv"
+JSON_HEADERS = {"content-type": "application/json"}
+
+
+def _entry(scenario: str, path: str, body, headers: Dict[str, str] = JSON_HEADERS) -> dict:
+    entry = {"scenario": scenario, "method": "POST", "path": path, "headers": dict(headers)}
+    if isinstance(body, bytes):
+        entry["body_b64"] = base64.b64encode(body).decode()
+    else:
+        entry["body"] = body
+    return entry
+
+
+def synthetic_corpus(csv_path: str = SAMPLE_PATH, n_single: int = 500, n_batches: int = 20,
+                     batch_size: int = 1000, seed: int = 0) -> List[dict]:
+    """Requests built from real reservations, categoricals sent as labels."""
+    from app.srv.api.dto import FEATURE_COLUMNS
+
+    columns = list(FEATURE_COLUMNS)
+    df = pd.read_csv(csv_path, usecols=columns)[columns]
+    rng = np.random.default_rng(seed)
+
+    corpus = []
+    for row in df.iloc[rng.integers(0, len(df), size=n_single)].to_dict(orient="records"):
+        corpus.append(_entry("predict", "/api/predict", row))
+        corpus.append(_entry("predict_fast", "/api/predict/fast", row))
+
+    for _ in range(n_batches):
+        batch = df.iloc[rng.integers(0, len(df), size=batch_size)]
+        columnar = batch.to_dict(orient="list")
+        corpus.append(_entry("batch", "/api/predict/batch", columnar))
+        corpus.append(_entry("batch_fast_json", "/api/predict/batch/fast", columnar))
+        corpus.append(_entry("batch_fast_rows", "/api/predict/batch/fast", batch.values.tolist()))
+
+        try:
+            import msgpack
+            corpus.append(_entry("batch_fast_msgpack", "/api/predict/batch/fast", msgpack.packb(columnar),
+                                 {"content-type": "application/msgpack"}))
+        except ImportError:
+            pass
+
+        try:
+            import pyarrow as pa
+            sink = pa.BufferOutputStream()
+            table = pa.Table.from_pandas(batch, preserve_index=False)
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            corpus.append(_entry("batch_fast_arrow", "/api/predict/batch/fast", sink.getvalue().to_pybytes(),
+                                 {"content-type": "application/vnd.apache.arrow.stream"}))
+        except ImportError:
+            pass
+
+    return corpus
+
+
+def load_corpus(path: str) -> List[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_corpus(corpus: List[dict], path: str):
+    with open(path, "w") as f:
+        for entry in corpus:
+            f.write(json.dumps(entry) + "\n")
+
+
+def prepare(entry: dict) -> Tuple[str, str, List[Tuple[str, str]], bytes]:
+    """(method, path, headers, body bytes) ready to send."""
+    if "body_b64" in entry:
+        body = base64.b64decode(entry["body_b64"])
+    else:
+        body = json.dumps(entry.get("body")).encode()
+    return entry.get("method", "POST"), entry["path"], list(entry.get("headers", JSON_HEADERS).items()), body
+
+
+class ASGITarget:
+    """Calls the app in process; every client shares it."""
+
+    def __init__(self):
+        from benchmarks.asgi_client import ASGIClient
+        from main import app
+
+        self.client = ASGIClient(app)
+
+    async def start(self):
+        await self.client.startup()
+
+    async def connect(self):
+        return self
+
+    async def send(self, method: str, path: str, headers, body: bytes) -> int:
+        status, _, _ = await self.client.request(method, path, body, headers=headers)
+        return status
+
+    async def close(self):
+        pass
+
+
+class StaleConnection(Exception):
+    """A reused connection was closed by the server before it answered."""
+
+
+class HTTPConnection:
+    """
+    One keep-alive HTTP/1.1 connection, enough for a load generator. Like
+    other HTTP clients, a request that finds its idle connection closed
+    by the server (e.g. a worker restarting) is resent on a new one.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def send(self, method: str, path: str, headers, body: bytes) -> int:
+        try:
+            return await self._send(method, path, headers, body)
+        except StaleConnection:
+            await self.close()
+            return await self._send(method, path, headers, body)
+
+    async def _send(self, method: str, path: str, headers, body: bytes) -> int:
+        reused = self.writer is not None
+        if not reused:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(body)}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers) + "\r\n"
+        try:
+            self.writer.write(head.encode("latin-1") + body)
+            await self.writer.drain()
+            status_line = await self.reader.readline()
+        except ConnectionError:
+            status_line = b""
+        if not status_line and reused:
+            raise StaleConnection()
+        status = int(status_line.split()[1])
+        length, chunked, close = 0, False, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding":
+                chunked = "chunked" in value
+            elif name == "connection":
+                close = value == "close"
+
+        if chunked:
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            await self.reader.readexactly(length)
+
+        if close:
+            await self.close()
+        return status
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class HTTPTarget:
+    """A running server, e.g. uvicorn main:app --workers 4."""
+
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+
+    async def start(self):
+        pass
+
+    async def connect(self) -> HTTPConnection:
+        return HTTPConnection(self.host, self.port)
+
+
+def summarize(latencies: List[float], statuses: List[int], elapsed: float) -> dict:
+    latencies_ms = np.asarray(latencies) * 1000
+    errors = sum(1 for status in statuses if status >= 400)
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]) if len(latencies_ms) else (np.nan,) * 3
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "error_rate": errors / max(len(latencies), 1),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(latencies_ms.max()) if len(latencies_ms) else float("nan"),
+    }
+
+
+async def run_level(target, requests: list, concurrency: int, duration: float, warmup: float) -> dict:
+    """Closed loop: `concurrency` clients, each sending its next request as soon as the last one returns."""
+    latencies, statuses = [], []
+    next_index = 0
+    started = time.perf_counter()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+
+    async def client():
+        nonlocal next_index
+        connection = await target.connect()
+        try:
+            while True:
+                method, path, headers, body = requests[next_index % len(requests)]
+                next_index += 1
+
+                start = time.perf_counter()
+                if start >= deadline:
+                    break
+                try:
+                    status = await connection.send(method, path, headers, body)
+                except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+                    status = 599
+                    await connection.close()
+                    connection = await target.connect()
+                end = time.perf_counter()
+
+                if start >= measure_from:
+                    latencies.append(end - start)
+                    statuses.append(status)
+        finally:
+            await connection.close()
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - measure_from)
+
+
+async def run(target, corpus: List[dict], levels: List[int], duration: float, warmup: float,
+              scenarios: Optional[List[str]] = None) -> List[dict]:
+    by_scenario: Dict[str, list] = {}
+    for entry in corpus:
+        by_scenario.setdefault(entry.get("scenario", entry["path"]), []).append(prepare(entry))
+
+    await target.start()
+    results = []
+    for scenario, requests in by_scenario.items():
+        if scenarios and scenario not in scenarios:
+            continue
+        for concurrency in levels:
+            stats = await run_level(target, requests, concurrency, duration, warmup)
+            results.append({"scenario": scenario, "concurrency": concurrency, **stats})
+            print(f"  {scenario:<22} c={concurrency:<4} {stats['rps']:>9,.1f} rps  p50 {stats['p50_ms']:>8.2f}  "
+                  f"p95 {stats['p95_ms']:>8.2f}  p99 {stats['p99_ms']:>8.2f} ms  errors {stats['errors']}")
+    return results
+
+
+def max_sustainable(results: List[dict], slo_p99_ms: float, max_error_rate: float) -> dict:
+    """Per scenario, the best throughput of any level whose p99 and error rate stay within the SLO."""
+    summary = {}
+    for result in results:
+        best = summary.setdefault(result["scenario"], {"max_sustainable_rps": 0.0, "at_concurrency": None})
+        within = result["p99_ms"] <= slo_p99_ms and result["error_rate"] <= max_error_rate
+        if within and result["rps"] > best["max_sustainable_rps"]:
+            best.update(max_sustainable_rps=result["rps"], at_concurrency=result["concurrency"])
+    return summary
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=APP_BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict):
+    """Print the change against a previous run for every scenario and level both have."""
+    previous = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"\nAgainst {baseline['meta'].get('commit')}")
+    for result in report["results"]:
+        before = previous.get((result["scenario"], result["concurrency"]))
+        if before is None:
+            continue
+        rps_change = (result["rps"] - before["rps"]) / max(before["rps"], 1e-9) * 100
+        p99_change = (result["p99_ms"] - before["p99_ms"]) / max(before["p99_ms"], 1e-9) * 100
+        print(f"  {result['scenario']:<22} c={result['concurrency']:<4} rps {rps_change:+7.1f}%   p99 {p99_change:+7.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="asgi", help='"asgi" (in process) or the base URL of a running server')
+    parser.add_argument("--corpus", help="JSON lines request corpus; synthetic from notebook/train.csv when omitted")
+    parser.add_argument("--write-corpus", help="save the corpus used to this path")
+    parser.add_argument("--scenarios", nargs="*", help="only run these scenarios")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--duration", type=float, default=5.0, help="measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=1.0, help="unmeasured seconds before each level")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per synthetic batch request")
+    parser.add_argument("--slo-p99-ms", type=float, default=100.0, help="p99 latency a sustainable level must stay under")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--keep-cache", action="store_true", help="leave the prediction cache on (in process only)")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    if args.target == "asgi" and not args.keep_cache:
+        # a replayed corpus would otherwise be served mostly from the cache
+        os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")
+
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(batch_size=args.batch_size)
+    if args.write_corpus:
+        write_corpus(corpus, args.write_corpus)
+
+    target = ASGITarget() if args.target == "asgi" else HTTPTarget(args.target)
+    print(f"Replaying {len(corpus)} requests against {args.target}")
+    results = asyncio.run(run(target, corpus, args.concurrency, args.duration, args.warmup, args.scenarios))
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "target": args.target,
+            "corpus": args.corpus or f"synthetic:{SAMPLE_PATH.name}",
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "slo_p99_ms": args.slo_p99_ms,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+        "summary": max_sustainable(results, args.slo_p99_ms, args.max_error_rate),
+    }
+
+    print("\nMax sustainable RPS (p99 <= {:g} ms)".format(args.slo_p99_ms))
+    for scenario, best in report["summary"].items():
+        print(f"  {scenario:<22} {best['max_sustainable_rps']:>9,.1f}  (c={best['at_concurrency']})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
@@ -0,0 +1,213 @@
+"""
+Cold start of the API: how long a fresh interpreter takes to import the
+app and answer its first prediction, which modules the import spends that
+time in, and whether anything outside the serving stack got imported.
+
+    python -m benchmarks.startup_report
+    python -m benchmarks.startup_report --runs 10 --top 25 --output startup.json
+
+Every run is a new `python -c` process, timed from spawn:
+
+    interpreter     spawn until the first line of the script runs
+    import main     FastAPI app built
+    startup         lifespan: model loaded, warm-up settled
+    first predict   first POST /api/predict answered, in process
+
+The per-module breakdown comes from one extra run under `-X importtime`,
+which inflates the times it measures, so only the ranking is meaningful.
+
+The serve path must not import training, storage or MLflow code; the
+report lists any such module found in sys.modules after the first
+prediction and exits with status 1, so CI can guard the import graph.
+LightGBM and its dependencies are allowed only when the served artifact
+is a pickled model rather than a compiled forest. The batch codec
+libraries must stay out of startup too, but be importable: a negotiated
+format whose library is missing also fails the report.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER = "STARTUP_REPORT "
+
+# never needed to serve predictions
+TRAINING_MODULES = (
+    "app.pipeline", "app.config.model_params", "app.utils.file_handler",
+    "app.srv.data_ingestion", "app.srv.data_preprocessing", "app.srv.balancing",
+    "app.srv.feature_ranking", "app.srv.hyperparameter_search", "app.srv.model_training",
+    "app.srv.object_storage",
+    "mlflow", "imblearn", "google.cloud", "dvc", "xgboost", "seaborn", "statsmodels",
+    "matplotlib", "pandas", "yaml",
+)
+# serving dependencies imported on first use by a batch codec only
+CODEC_MODULES = ("msgpack", "pyarrow")
+# what unpickling a LightGBM model imports
+PICKLED_MODEL_MODULES = ("lightgbm", "sklearn", "scipy", "joblib")
+
+CHILD = f"""
+import json, sys, time
+started = time.time()
+import main
+imported = time.time()
+
+import asyncio
+from benchmarks.asgi_client import ASGIClient
+
+row = {{"lead_time": 30, "no_of_special_requests": 1, "avg_price_per_room": 100.0, "arrival_month": 6,
+        "arrival_date": 15, "no_of_week_nights": 2, "no_of_weekend_nights": 1,
+        "market_segment_type": 1, "type_of_meal_plan": 0, "room_type_reserved": 0}}
+
+async def first_prediction():
+    client = ASGIClient(main.app)
+    await client.startup()
+    ready = time.time()
+    status, _, _ = await client.post_json("/api/predict", json.dumps(row).encode())
+    return ready, status
+
+ready, status = asyncio.run(first_prediction())
+predicted = time.time()
+modules = sorted(sys.modules)
+
+from app.srv.api import codecs
+
+print({MARKER!r} + json.dumps({{
+    "started": started, "imported": imported, "ready": ready, "predicted": predicted, "status": status,
+    "artifact": str(main.registry.active.path), "modules": modules,
+    "unavailable_formats": codecs.unavailable(),
+}}))
+"""
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_DIR, env.get("PYTHONPATH")]))
+    return env
+
+
+def cold_start(python: str, importtime: bool = False) -> Tuple[dict, str]:
+    args = [python] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD]
+    spawned = time.time()
+    proc = subprocess.run(args, cwd=REPO_DIR, env=_child_env(), capture_output=True, text=True)
+    lines = [line for line in proc.stdout.splitlines() if line.startswith(MARKER)]
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(f"Startup run failed with status {proc.returncode}:\n{proc.stderr[-2000:]}")
+
+    result = json.loads(lines[-1][len(MARKER):])
+    result["timings"] = {
+        "interpreter_s": result["started"] - spawned,
+        "import_main_s": result["imported"] - result["started"],
+        "startup_s": result["ready"] - result["imported"],
+        "first_prediction_s": result["predicted"] - result["ready"],
+        "total_s": result["predicted"] - spawned,
+    }
+    return result, proc.stderr
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) for every line of -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def by_package(rows: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """Self time summed per top-level package, app modules kept whole."""
+    totals = defaultdict(int)
+    for name, self_us, _ in rows:
+        key = name if name.startswith("app.") or name == "main" else name.split(".")[0]
+        totals[key] += self_us
+    return dict(totals)
+
+
+def violations(modules: List[str], artifact: str) -> List[str]:
+    forbidden = TRAINING_MODULES + CODEC_MODULES
+    if not artifact.endswith(".pkl"):
+        forbidden += PICKLED_MODEL_MODULES
+    return sorted({f for m in modules for f in forbidden if m == f or m.startswith(f + ".")})
+
+
+def report(runs: List[dict], rows: List[Tuple[str, int, int]], top: int, bad: List[str], artifact: str,
+           unavailable: List[str]) -> dict:
+    phases = runs[0]["timings"].keys()
+    return {
+        "artifact": artifact,
+        "runs": len(runs),
+        "median": {phase: statistics.median(run["timings"][phase] for run in runs) for phase in phases},
+        "min": {phase: min(run["timings"][phase] for run in runs) for phase in phases},
+        "modules_imported": len(runs[0]["modules"]),
+        "top_packages_ms": {
+            name: round(us / 1000, 1)
+            for name, us in sorted(by_package(rows).items(), key=lambda kv: -kv[1])[:top]
+        },
+        "app_modules_cumulative_ms": {
+            name: round(cumulative / 1000, 1)
+            for name, _, cumulative in sorted(rows, key=lambda r: -r[2])
+            if name.startswith("app.") or name == "main"
+        },
+        "serve_path_violations": bad,
+        "unavailable_formats": unavailable,
+    }
+
+
+def print_report(result: dict):
+    print(f"artifact: {result['artifact']}")
+    print(f"{'phase':<20} {'median ms':>10} {'min ms':>10}   ({result['runs']} cold runs)")
+    for phase in result["median"]:
+        print(f"{phase:<20} {result['median'][phase] * 1000:>10.1f} {result['min'][phase] * 1000:>10.1f}")
+
+    print(f"\n{result['modules_imported']} modules imported; slowest packages (self time under -X importtime):")
+    for name, ms in result["top_packages_ms"].items():
+        print(f"  {name:<40} {ms:>8.1f} ms")
+
+    print("\napp modules (cumulative, including what they import):")
+    for name, ms in result["app_modules_cumulative_ms"].items():
+        print(f"  {name:<40} {ms:>8.1f} ms")
+
+    if result["serve_path_violations"]:
+        print(f"\nNOT serve-only, imported: {', '.join(result['serve_path_violations'])}")
+    else:
+        print("\nserve path imports no training, storage or MLflow modules")
+
+    if result["unavailable_formats"]:
+        print(f"advertised formats without their library: {', '.join(result['unavailable_formats'])}")
+    else:
+        print("every advertised batch format is importable")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="cold starts to time")
+    parser.add_argument("--top", type=int, default=20, help="packages listed in the breakdown")
+    parser.add_argument("--python", default=sys.executable, help="interpreter to start")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    # the first start compiles bytecode and warms the page cache, keep it out
+    cold_start(args.python)
+    runs = [cold_start(args.python)[0] for _ in range(args.runs)]
+    for run in runs:
+        if run["status"] != 200:
+            raise SystemExit(f"First prediction answered {run['status']}")
+
+    _, stderr = cold_start(args.python, importtime=True)
+    artifact = runs[0]["artifact"]
+    result = report(runs, parse_importtime(stderr), args.top, violations(runs[0]["modules"], artifact), artifact,
+                    runs[0]["unavailable_formats"])
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+    sys.exit(1 if result["serve_path_violations"] or result["unavailable_formats"] else 0)
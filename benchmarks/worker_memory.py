@@ -0,0 +1,50 @@
+"""
+Per-worker memory of a running server, from /proc/<pid>/smaps_rollup.
+
+    python -m benchmarks.worker_memory <server pid>
+
+RSS counts every resident page a worker maps, including pages it shares
+with its siblings; PSS splits shared pages evenly between the processes
+mapping them, so the PSS of all processes adds up to the real footprint.
+Private pages are the ones a worker alone holds.
+"""
+import argparse
+import os
+from typing import Dict, List
+
+
+def children(pid: int) -> List[int]:
+    found = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            found.extend(int(child) for child in f.read().split())
+    return found
+
+
+def memory_mb(pid: int) -> Dict[str, float]:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                fields[name] = int(value.split()[0]) / 1024
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "private": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pid", type=int, help="pid of the server's parent process")
+    args = parser.parse_args()
+
+    rows = [("parent", args.pid)] + [("worker", pid) for pid in children(args.pid)]
+    print(f"{'process':<8} {'pid':>8} {'RSS MB':>9} {'PSS MB':>9} {'private MB':>11}")
+    total = 0.0
+    for role, pid in rows:
+        mem = memory_mb(pid)
+        total += mem["pss"]
+        print(f"{role:<8} {pid:>8} {mem['rss']:>9.1f} {mem['pss']:>9.1f} {mem['private']:>11.1f}")
+    print(f"{'total PSS':<18} {total:>9.1f}")
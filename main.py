@@ -1,12 +1,23 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config.secrets import SecretManager
-from app.srv.api.controller import router
+from app.srv.api.controller import router, admin_router, registry, cache, executor, shadow
+from app.srv.api import instrumentation
+from app.srv.api.lifecycle import Lifecycle
+from app.utils.metrics import REGISTRY
+
+if __name__ != "__main__":
+    # imported by uvicorn and its workers; run as a script, this process is
+    # the prefork parent, which only enables it in the workers it forks
+    instrumentation.configure_multiprocess()
+lifecycle = Lifecycle(registry, cache, executor, shadow)
 
 app = FastAPI(
     title="Hotel Reservation ML Service",
     description="A simple microservice to guardrail against hotel reservation abuse",
     version="1.0.0",
+    lifespan=lifecycle.lifespan,
 )
 
 app.add_middleware(
@@ -17,16 +28,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(instrumentation.InstrumentationMiddleware, registry=registry)
+
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Krib"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return REGISTRY.render()
+
+
+@app.get("/healthz", include_in_schema=False)
+def healthz():
+    return lifecycle.health()
+
+
+@app.get("/readyz", include_in_schema=False)
+def readyz():
+    readiness = lifecycle.readiness()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+
 app.include_router(router)
+app.include_router(admin_router)
 
 
 
 if __name__ == "__main__":
-    import uvicorn
+    if SecretManager.ENV.is_local:
+        import uvicorn
+
+        uvicorn.run("main:app", host="0.0.0.0", port=SecretManager.PORT, reload=True)
+    else:
+        from app.srv.api.prefork import PreforkServer
 
-    uvicorn.run("main:app", host="0.0.0.0", port=SecretManager.PORT, reload=SecretManager.ENV.is_local)
+        # loaded once here and shared with every forked worker; each worker
+        # still runs the lifespan warm-up in its own process
+        lifecycle.load_model()
+        PreforkServer(app, registry).run()
@@ -0,0 +1,44 @@
+import numpy as np
+import lightgbm as lgb
+
+from app.config.paths_config import APP_BASE_DIR, PROCESSED_DIR, CONFIG_PATH
+from app.srv.compiled_model import CompiledForest
+from app.srv.data_preprocessing import DataProcessor
+from app.srv.api.dto import FEATURE_COLUMNS
+from app.utils.file_handler import load_data
+from app.utils.logger import AppLogger
+
+
+logger = AppLogger(__file__)()
+
+SAMPLE_PATH = APP_BASE_DIR / "notebook/train.csv"
+
+
+def check_parity(boosting_type: str, X, y):
+    model = lgb.LGBMClassifier(boosting_type=boosting_type, n_estimators=200, num_leaves=63,
+                               random_state=42, verbose=-1)
+    model.fit(X, y)
+
+    compiled = CompiledForest.from_classifier(model)
+
+    X_eval = X.to_numpy(dtype=np.float64, copy=True)
+    X_eval[::13, 2] = np.nan
+
+    max_diff = np.abs(compiled.predict_proba(X_eval) - model.predict_proba(X_eval)).max()
+    labels_match = (compiled.predict(X_eval) == model.predict(X_eval)).all()
+
+    logger.info(f"{boosting_type} :: max probability difference {max_diff}, labels match {labels_match}")
+    assert max_diff < 1e-9 and labels_match, f"Compiled {boosting_type} model diverges from LightGBM"
+
+
+if __name__ == "__main__":
+    processor = DataProcessor(SAMPLE_PATH, SAMPLE_PATH, PROCESSED_DIR, CONFIG_PATH)
+    df = processor.preprocess_data(load_data(SAMPLE_PATH), fit=True)
+
+    X = df[list(FEATURE_COLUMNS)]
+    y = df["booking_status"]
+
+    for boosting_type in ["gbdt", "dart", "goss"]:
+        check_parity(boosting_type, X, y)
+
+    logger.info("Compiled model matches LightGBM predict_proba")
@@ -0,0 +1,70 @@
+import json
+
+import numpy as np
+from pydantic import ValidationError
+
+from app.srv.api import fastpath
+from app.srv.api.dto import FEATURE_COLUMNS, BatchPredictionInput
+from app.utils.logger import AppLogger
+
+
+logger = AppLogger(__file__)()
+
+ROW = {
+    "lead_time": 30,
+    "no_of_special_requests": 1,
+    "avg_price_per_room": 99.5,
+    "arrival_month": 6,
+    "arrival_date": 14,
+    "market_segment_type": 1,
+    "no_of_week_nights": 2,
+    "no_of_weekend_nights": 1,
+    "type_of_meal_plan": 0,
+    "room_type_reserved": 0,
+}
+
+
+def columnar(n_rows: int) -> dict:
+    return {col: [ROW[col]] * n_rows for col in FEATURE_COLUMNS}
+
+
+def check_valid():
+    body = json.dumps(columnar(3)).encode()
+    X = fastpath.parse_batch(body)
+    expected = BatchPredictionInput.model_validate_json(body).to_numpy()
+    assert X.dtype == np.float32 and X.shape == (3, len(FEATURE_COLUMNS))
+    assert np.array_equal(X, expected)
+
+
+def check_rejected(name: str, payload: dict):
+    body = json.dumps(payload).encode()
+    try:
+        BatchPredictionInput.model_validate_json(body)
+        raise AssertionError(f"{name} : the validated route accepted it")
+    except ValidationError:
+        pass
+    try:
+        fastpath.parse_batch(body)
+        raise AssertionError(f"{name} : the fast path accepted it")
+    except fastpath.PayloadError as e:
+        logger.info(f"{name} rejected : {e}")
+
+
+if __name__ == "__main__":
+    check_valid()
+
+    ragged = columnar(3)
+    second, third = FEATURE_COLUMNS[1], FEATURE_COLUMNS[2]
+    ragged[second] = [7]
+    ragged[third] = 5
+    check_rejected("one-element and scalar columns", ragged)
+
+    longer = columnar(3)
+    longer[second] = longer[second] * 2
+    check_rejected("longer column", longer)
+
+    missing = columnar(3)
+    del missing[third]
+    check_rejected("missing column", missing)
+
+    logger.info("Fast path payload checks passed")
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+
+from app.srv.api.executor import InferenceExecutor, Overloaded
+from app.utils.logger import AppLogger
+
+
+logger = AppLogger(__file__)()
+
+
+async def check_cancelled_queued_call():
+    executor = InferenceExecutor(workers=1, max_queue=2, queue_timeout=0)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(executor.run(release.wait))
+    while executor.stats()["running"] == 0:
+        await asyncio.sleep(0.01)
+
+    # queued behind the blocked call, then abandoned like a disconnected client
+    queued = asyncio.ensure_future(executor.run(lambda: None))
+    await asyncio.sleep(0.01)
+    assert executor.stats()["queued"] == 1
+    queued.cancel()
+    try:
+        await queued
+    except asyncio.CancelledError:
+        pass
+
+    release.set()
+    await running
+    stats = executor.stats()
+    assert stats["queued"] == 0 and stats["running"] == 0, f"slots leaked : {stats}"
+
+    # the freed slots take new calls again
+    await asyncio.gather(*(executor.run(lambda: None) for _ in range(3)))
+    executor.shutdown()
+    logger.info("Cancelled queued call released its slot")
+
+
+async def check_shutdown_cancels_queued():
+    executor = InferenceExecutor(workers=1, max_queue=4, queue_timeout=0)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(executor.run(release.wait))
+    while executor.stats()["running"] == 0:
+        await asyncio.sleep(0.01)
+    queued = [asyncio.ensure_future(executor.run(lambda: None)) for _ in range(4)]
+    await asyncio.sleep(0.01)
+    try:
+        await executor.run(lambda: None)
+        raise AssertionError("a full queue should have shed the call")
+    except Overloaded as e:
+        assert e.reason == "queue_full"
+
+    executor.shutdown()
+    release.set()
+    await running
+    results = await asyncio.gather(*queued, return_exceptions=True)
+    assert all(isinstance(result, asyncio.CancelledError) for result in results), results
+    assert executor.stats()["queued"] == 0, executor.stats()
+    logger.info("Shutdown cancelled the queued calls and released their slots")
+
+
+if __name__ == "__main__":
+    asyncio.run(check_cancelled_queued_call())
+    asyncio.run(check_shutdown_cancels_queued())
+    logger.info("Inference executor checks passed")
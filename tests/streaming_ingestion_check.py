@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+from app.config.paths_config import APP_BASE_DIR, CONFIG_PATH
+from app.srv.data_ingestion import DataIngestion
+from app.srv.object_storage import LocalBackend, RangedDownloader
+from app.utils.file_handler import read_yaml, load_data
+from app.utils.error import CustomException
+from app.utils.logger import AppLogger
+
+
+logger = AppLogger(__file__)()
+
+SAMPLE_PATH = APP_BASE_DIR / "notebook/train.csv"
+OBJECT_NAME = "Hotel_Reservations.csv"
+CHUNK_SIZE = 64 * 1024
+
+
+class FlakyBackend(LocalBackend):
+    """Fails every read after the first `fail_after` ones, to interrupt a download."""
+
+    def __init__(self, root: str, fail_after: int):
+        super().__init__(root)
+        self.fail_after = fail_after
+        self.reads = 0
+
+    def read_range(self, name: str, start: int, end: int) -> bytes:
+        self.reads += 1
+        if self.reads > self.fail_after:
+            raise ConnectionError("connection reset")
+        return super().read_range(name, start, end)
+
+
+def check_resume(bucket: str, target: str):
+    flaky = FlakyBackend(bucket, fail_after=10)
+    try:
+        RangedDownloader(flaky, CHUNK_SIZE, workers=1).download(OBJECT_NAME, target)
+        raise AssertionError("interrupted download should have failed")
+    except CustomException:
+        pass
+
+    resumed = FlakyBackend(bucket, fail_after=10_000)
+    RangedDownloader(resumed, CHUNK_SIZE, workers=4).download(OBJECT_NAME, target)
+
+    n_chunks = -(-os.path.getsize(target) // CHUNK_SIZE)
+    assert resumed.reads == n_chunks - 10, f"resume refetched {resumed.reads} of {n_chunks} chunks"
+    assert RangedDownloader.verify(target, LocalBackend(bucket).md5(OBJECT_NAME)) is None
+    logger.info(f"Resumed download fetched {resumed.reads} of {n_chunks} chunks")
+
+
+def check_checksum(bucket: str, target: str):
+    backend = LocalBackend(bucket)
+    backend.md5 = lambda name: "AAAAAAAAAAAAAAAAAAAAAA=="
+    try:
+        RangedDownloader(backend, CHUNK_SIZE).download(OBJECT_NAME, target)
+        raise AssertionError("checksum mismatch should have failed")
+    except CustomException:
+        logger.info("Checksum mismatch rejected")
+
+
+def check_split(config: dict, source: str, tmp: str):
+    ingestion = DataIngestion(config, backend=LocalBackend(tmp))
+
+    sizes = []
+    for chunk_rows in (1_000, 7_777):
+        ingestion.split_chunk_rows = chunk_rows
+        train_path, test_path = os.path.join(tmp, f"train_{chunk_rows}.parquet"), os.path.join(tmp, f"test_{chunk_rows}.parquet")
+        ingestion.split_streaming(source, train_path, test_path)
+        sizes.append((load_data(train_path)["Booking_ID"].tolist(), load_data(test_path)["Booking_ID"].tolist()))
+
+    (train_ids, test_ids), other = sizes
+    assert (train_ids, test_ids) == other, "split depends on the chunk size"
+    assert not set(train_ids) & set(test_ids)
+
+    ratio = len(train_ids) / (len(train_ids) + len(test_ids))
+    assert abs(ratio - config["data_ingestion"]["train_ratio"]) < 0.01, f"train ratio {ratio}"
+    logger.info(f"Hash split is chunk-size independent, train ratio {ratio:.3f}")
+
+
+if __name__ == "__main__":
+    config = read_yaml(CONFIG_PATH)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bucket = os.path.join(tmp, "bucket")
+        os.makedirs(bucket)
+        pd.read_csv(SAMPLE_PATH, index_col=0).to_csv(os.path.join(bucket, OBJECT_NAME), index=False)
+
+        target = os.path.join(tmp, "raw.csv")
+        check_resume(bucket, target)
+        check_checksum(bucket, os.path.join(tmp, "corrupt.csv"))
+        check_split(config, target, tmp)
+
+    logger.info("Streaming ingestion checks passed")